@@ -1,14 +1,20 @@
 import os
+import logging
 import xarray as xr
 import numpy as np
 import rasterio
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from ..base_calculator import BaseIndicatorCalculator
 from ..data_downloader import IndicatorDataDownloader
-from ....tools import info, error, warning
+from ..processing_utils import grid_transform
+from ....tools import info, error, warning, debug, logging_manager
+
+# CDD is a whole number of days (0-366), so results are stored as int16 with
+# this sentinel marking pixels without valid data
+CDD_NODATA = -1
 
 
 class CDDCalculator(BaseIndicatorCalculator):
@@ -57,42 +63,44 @@ class CDDCalculator(BaseIndicatorCalculator):
                 parallel_downloads=4
             )
             
-            # Download data for all years
-            datasets = downloader.download_all_years()
+            # Stream years through the worker pool: the next year downloads while
+            # earlier years are computed, and each result is written as soon as it
+            # is ready, so at most max_workers years are held in memory at once.
+            processed_count = 0
+            saved_flags = []
+            max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = {}
+                for year, dataset in downloader.iter_years():
+                    processed_count += 1
+                    precip_values = self._prepare_precipitation(year, dataset)
+                    if precip_values is None:
+                        continue
+                    
+                    future = executor.submit(_calculate_cdd_for_year, year, precip_values)
+                    # Keep only coordinates and attributes for georeferencing the output
+                    pending[future] = (year, dataset.drop_vars('Precipitation'))
+                    del dataset, precip_values
+                    
+                    if len(pending) >= max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            saved = self._save_cdd_future(future, *pending.pop(future))
+                            if saved is not None:
+                                saved_flags.append(saved)
+                
+                for future in as_completed(pending):
+                    saved = self._save_cdd_future(future, *pending[future])
+                    if saved is not None:
+                        saved_flags.append(saved)
             
-            if not datasets:
+            if processed_count == 0:
                 error("No data downloaded",
                       component="cdd_calculator")
                 return False
             
-            # Calculate CDD for each year in parallel
-            results = {}
-            max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_year = {
-                    executor.submit(self._calculate_cdd_for_year, year, dataset): year
-                    for year, dataset in datasets.items()
-                }
-                
-                for future in as_completed(future_to_year):
-                    year = future_to_year[future]
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            results[year] = result
-                            info("CDD calculated for year",
-                                 component="cdd_calculator",
-                                 year=year)
-                    except Exception as e:
-                        error("Failed to calculate CDD for year",
-                              component="cdd_calculator",
-                              year=year,
-                              error=str(e))
-            
-            # Save results
-            if results:
-                success = self._save_cdd_results(results, datasets)
-                
+            # Save status of every year that produced a result
+            if saved_flags:
                 # Clean up temporary download directory
                 try:
                     temp_dir = self.output_path / "temp_downloads"
@@ -108,7 +116,7 @@ class CDDCalculator(BaseIndicatorCalculator):
                             temp_dir=str(temp_dir),
                             error=str(e))
                 
-                return success
+                return all(saved_flags)
             else:
                 error("No CDD results calculated",
                       component="cdd_calculator")
@@ -156,115 +164,74 @@ class CDDCalculator(BaseIndicatorCalculator):
                   error=str(e))
             return {}
 
-    def _calculate_cdd_for_year(self, year: int, dataset: xr.Dataset) -> Optional[np.ndarray]:
+    def _prepare_precipitation(self, year: int, dataset: xr.Dataset) -> Optional[np.ndarray]:
         """
-        Calculate CDD values for a specific year using xarray Dataset.
+        Extract precipitation values for a year and clean them for CDD calculation.
         
         Args:
-            year: Year to calculate CDD for
+            year: Year being prepared
             dataset: xarray Dataset with daily precipitation data
             
         Returns:
-            numpy array with CDD values, or None if calculation fails
+            3D numpy array (time, lat, lon) in mm/day, or None if preparation fails
         """
         try:
-            info("Calculating CDD for year",
-                 component="cdd_calculator",
-                 year=year,
-                 dataset_shape=dataset['Precipitation'].shape)
-            
             # Get precipitation data
             precip_data = dataset['Precipitation']
-            
-            # Convert precipitation to mm/day if needed (check units)
             precip_values = precip_data.values
             
-            # Handle invalid values (CHIRPS often uses -9999 for no data)
-            # Set negative values and typical no-data values to NaN
-            invalid_mask = (precip_values < 0) | (precip_values == -9999) | (precip_values > 1000)
-            if np.any(invalid_mask):
-                precip_values = precip_values.copy()  # Make a copy to avoid modifying original
-                precip_values[invalid_mask] = np.nan
-                invalid_count = np.sum(invalid_mask)
+            # Mask invalid values in place and get the largest valid value in one scan
+            invalid_count, max_valid = _scan_precip(precip_values)
+            if invalid_count:
                 info(f"Converted {invalid_count} invalid values to NaN (negative, -9999, or > 1000mm)",
                      component="cdd_calculator",
                      year=year,
                      invalid_count=invalid_count)
             
             # Check if values are in m/day (very small values) and convert to mm/day
-            valid_values = precip_values[~np.isnan(precip_values)]
-            if len(valid_values) > 0 and np.max(valid_values) < 1 and np.max(valid_values) > 0:
-                precip_values = precip_values * 1000  # Convert from m to mm
+            if 0 < max_valid < 1:
+                precip_values *= 1000  # Convert from m to mm
                 info("Converted precipitation from m to mm",
                      component="cdd_calculator",
                      year=year)
             
-            # Calculate CDD for each pixel
-            cdd_values = self._calculate_consecutive_dry_days(precip_values)
-            
-            # Handle cases where all values were NaN
-            all_nan_mask = np.all(np.isnan(precip_values), axis=0)
-            cdd_values[all_nan_mask] = np.nan
-            
-            info("CDD calculation completed for year",
-                 component="cdd_calculator",
-                 year=year,
-                 max_cdd=np.nanmax(cdd_values),
-                 min_cdd=np.nanmin(cdd_values),
-                 mean_cdd=np.nanmean(cdd_values))
-            
-            return cdd_values
+            return precip_values
             
         except Exception as e:
-            error("Failed to calculate CDD for year",
+            error("Failed to prepare precipitation for year",
                   component="cdd_calculator",
                   year=year,
                   error=str(e))
             return None
 
-    def _calculate_consecutive_dry_days(self, precip_values: np.ndarray) -> np.ndarray:
+    def _save_cdd_future(self, future: Future, year: int, georef: xr.Dataset) -> Optional[bool]:
         """
-        Calculate maximum consecutive dry days for each pixel.
+        Collect a finished CDD computation and save its result.
         
         Args:
-            precip_values: 3D array (time, lat, lon) with precipitation values
+            future: Completed future returned by _calculate_cdd_for_year
+            year: Year the future was computed for
+            georef: Dataset holding the coordinates and attributes for that year
             
         Returns:
-            2D array (lat, lon) with maximum consecutive dry days
+            None if no CDD result was calculated, otherwise whether saving succeeded
         """
-        time_steps, height, width = precip_values.shape
-        cdd_result = np.zeros((height, width), dtype=np.float32)
+        try:
+            result = future.result()
+        except Exception as e:
+            error("Failed to calculate CDD for year",
+                  component="cdd_calculator",
+                  year=year,
+                  error=str(e))
+            return None
         
-        # Process each pixel
-        for i in range(height):
-            for j in range(width):
-                pixel_precip = precip_values[:, i, j]
-                
-                # Skip if all values are NaN
-                if np.all(np.isnan(pixel_precip)):
-                    cdd_result[i, j] = np.nan
-                    continue
-                
-                # Find dry days (precipitation < 1 mm)
-                dry_days = pixel_precip < 1.0
-                
-                # Handle NaN values - treat them as not dry
-                dry_days = np.where(np.isnan(pixel_precip), False, dry_days)
-                
-                # Calculate consecutive dry periods
-                max_consecutive = 0
-                current_consecutive = 0
-                
-                for k in range(len(dry_days)):
-                    if dry_days[k]:
-                        current_consecutive += 1
-                        max_consecutive = max(max_consecutive, current_consecutive)
-                    else:
-                        current_consecutive = 0
-                
-                cdd_result[i, j] = max_consecutive
+        if result is None:
+            return None
         
-        return cdd_result
+        info("CDD calculated for year",
+             component="cdd_calculator",
+             year=year)
+        return self._save_cdd_results({year: result}, {year: georef})
 
     def _save_cdd_results(self, results: dict, datasets: dict) -> bool:
         """
@@ -309,7 +276,7 @@ class CDDCalculator(BaseIndicatorCalculator):
         Save data as GeoTIFF with proper georeferencing from dataset.
         
         Args:
-            data: 2D numpy array with CDD values
+            data: 2D numpy array with CDD values (CDD_NODATA for no data)
             output_path: Output file path
             year: Year for metadata
             dataset: xarray Dataset for spatial information
@@ -321,14 +288,8 @@ class CDDCalculator(BaseIndicatorCalculator):
             lons = dataset.lon.values
             lats = dataset.lat.values
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
-            
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
             
             # Get CRS from dataset attributes or use default
             crs = dataset.attrs.get('crs', 'EPSG:4326')
@@ -340,13 +301,13 @@ class CDDCalculator(BaseIndicatorCalculator):
                 height=height,
                 width=width,
                 count=1,
-                dtype=data.dtype,
+                dtype='int16',
                 crs=crs,
                 transform=transform,
                 compress='lzw',
-                nodata=np.nan
+                nodata=CDD_NODATA
             ) as dst:
-                dst.write(data, 1)
+                dst.write(data.astype(np.int16, copy=False), 1)
                 
                 # Add metadata
                 dst.update_tags(
@@ -383,6 +344,123 @@ class CDDCalculator(BaseIndicatorCalculator):
         return False
 
 
+def _scan_precip(precip_values: np.ndarray) -> Tuple[int, float]:
+    """
+    Set invalid precipitation values to NaN in place and summarize the array.
+    
+    Replaces the separate any/sum/boolean-index/max passes with a single mask
+    build plus one NaN-ignoring reduction, without copying the array.
+    
+    Args:
+        precip_values: 3D array (time, lat, lon) with precipitation values
+        
+    Returns:
+        Tuple of (number of invalid values, largest valid value or NaN)
+    """
+    # Negative values (including the -9999 no-data marker) and values > 1000mm are invalid
+    invalid_mask = (precip_values < 0) | (precip_values > 1000)
+    invalid_count = int(np.count_nonzero(invalid_mask))
+    if invalid_count:
+        np.putmask(precip_values, invalid_mask, np.nan)
+    
+    # fmax ignores NaN and returns NaN (without warning) when every value is NaN
+    max_valid = float(np.fmax.reduce(precip_values, axis=None))
+    
+    return invalid_count, max_valid
+
+
+def _calculate_cdd_for_year(year: int, precip_values: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Calculate CDD values for a specific year.
+    
+    Defined at module level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        year: Year to calculate CDD for
+        precip_values: 3D array (time, lat, lon) with precipitation in mm/day
+        
+    Returns:
+        int16 numpy array with CDD values (CDD_NODATA where there is no data),
+        or None if calculation fails
+    """
+    try:
+        info("Calculating CDD for year",
+             component="cdd_calculator",
+             year=year,
+             dataset_shape=precip_values.shape)
+        
+        # Calculate CDD for each pixel (all-NaN pixels are set to CDD_NODATA by the kernel)
+        cdd_values = _calculate_consecutive_dry_days(precip_values)
+        
+        info("CDD calculation completed for year",
+             component="cdd_calculator",
+             year=year)
+        
+        # Summary statistics cost a masked copy and three extra passes over the
+        # grid, so they are only computed when debug logging is enabled
+        if logging_manager.logger.isEnabledFor(logging.DEBUG):
+            valid_cdd = cdd_values[cdd_values != CDD_NODATA]
+            debug("CDD statistics for year",
+                  component="cdd_calculator",
+                  year=year,
+                  max_cdd=int(valid_cdd.max()) if valid_cdd.size else None,
+                  min_cdd=int(valid_cdd.min()) if valid_cdd.size else None,
+                  mean_cdd=float(valid_cdd.mean()) if valid_cdd.size else None)
+        
+        return cdd_values
+        
+    except Exception as e:
+        error("Failed to calculate CDD for year",
+              component="cdd_calculator",
+              year=year,
+              error=str(e))
+        return None
+
+
+def _calculate_consecutive_dry_days(precip_values: np.ndarray) -> np.ndarray:
+    """
+    Calculate maximum consecutive dry days for each pixel.
+    
+    The array is swept one day at a time: every step reads a contiguous
+    (lat, lon) plane of the C-ordered (time, lat, lon) cube and updates the
+    running dry-spell length of all pixels at once, so memory is streamed
+    sequentially instead of striding through each pixel's time series.
+    
+    Args:
+        precip_values: 3D array (time, lat, lon) with precipitation values
+        
+    Returns:
+        2D int16 array (lat, lon) with maximum consecutive dry days,
+        CDD_NODATA for pixels where every value is NaN
+    """
+    precip_values = np.ascontiguousarray(precip_values)
+    time_steps, height, width = precip_values.shape
+    
+    current_spell = np.zeros((height, width), dtype=np.int16)
+    cdd_result = np.zeros((height, width), dtype=np.int16)
+    has_data = np.zeros((height, width), dtype=bool)
+    dry_day = np.empty((height, width), dtype=bool)
+    
+    for t in range(time_steps):
+        day_precip = precip_values[t]
+        
+        # Dry day: precipitation < 1 mm. NaN compares False, so missing
+        # values are treated as not dry and break the spell.
+        np.less(day_precip, 1.0, out=dry_day)
+        
+        # Extend the spell on dry days and reset it otherwise
+        current_spell += 1
+        np.multiply(current_spell, dry_day, out=current_spell)
+        np.maximum(cdd_result, current_spell, out=cdd_result)
+        
+        has_data |= ~np.isnan(day_precip)
+    
+    # Pixels where all values are NaN
+    cdd_result[~has_data] = CDD_NODATA
+    
+    return cdd_result
+
+
 class CDDDataProcessor:
     """
     Helper class for CDD data processing operations.
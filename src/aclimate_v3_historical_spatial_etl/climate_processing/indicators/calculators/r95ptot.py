@@ -1,14 +1,25 @@
 import os
+import logging
 import xarray as xr
 import numpy as np
 import rasterio
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from ..percentile_calculator import PrecipitationPercentileCalculator
 from ..data_downloader import IndicatorDataDownloader
-from ....tools import info, error, warning
+from ..processing_utils import SWEEP_BLOCK_PIXELS, detect_precipitation_scale, grid_transform
+from ....tools import info, error, warning, debug, logging_manager
+
+__all__ = ['R95pTOTCalculator']
+
+# Pixels per worker task; larger grids are split into bands of rows so a single
+# year is spread over several workers and each task ships a bounded slice
+R95PTOT_TILE_PIXELS = 512 * 512
+
+# Minimum daily precipitation (mm) for a wet day
+WET_DAY_THRESHOLD = 1.0
 
 
 class R95pTOTCalculator(PrecipitationPercentileCalculator):
@@ -23,6 +34,12 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
     INDICATOR_CODE = "R95pTOT"
     SUPPORTED_TEMPORALITIES = ["annual"]  # Only annual for now
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Output georeferencing is the same for every year, so it is computed once
+        self._cached_transform = None
+        self._cached_crs = None
+    
     @property
     def required_percentiles(self) -> list:
         return [95]
@@ -63,42 +80,89 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
             
             percentile_95 = percentiles_dict[95]
             
-            # Get datasets for indicator calculation (reusing base period data when possible)
-            datasets = self.get_datasets_for_indicator_calculation(start_year, end_year)
-            
-            if not datasets:
-                error("Failed to get datasets for R95pTOT calculation",
-                      component="r95ptot_calculator")
-                return False
-            
-            # Calculate R95pTOT for each year in parallel
-            results = {}
+            # Calculate R95pTOT for each year in parallel. The reduction is CPU-bound,
+            # so it runs in worker processes; a memory-mapped percentile is sent as
+            # its .npy path so workers map the same file instead of receiving a copy.
+            # Precipitation is sent as float32, which is all the indicator needs and
+            # halves what is pickled to the workers when the source is float64.
+            percentile_source = percentile_95.filename if isinstance(percentile_95, np.memmap) else percentile_95
+            downloaded_years = set()
+            datasets = {}
             max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_year = {
-                    executor.submit(self._calculate_r95ptot_for_year, year, dataset, percentile_95): year
-                    for year, dataset in datasets.items()
-                }
+            with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+                    ThreadPoolExecutor(max_workers=4) as io_executor:
+                # Years are submitted as soon as they are available (reused from the
+                # base period or downloaded), so later downloads overlap with compute.
+                # Grids larger than R95PTOT_TILE_PIXELS are split into bands of rows.
+                # At most max_workers tiles are in flight, so peak memory does not
+                # grow with the number of years. Each year is handed to a writer
+                # thread as soon as its last tile finishes, so GeoTIFF writes overlap
+                # with the remaining compute.
+                future_to_tile = {}
+                tiles_left = {}
+                year_results = {}
+                save_futures = []
+                for year, dataset in self.iter_datasets_for_indicator_calculation(start_year, end_year):
+                    downloaded_years.add(year)
+                    precip_values = dataset['Precipitation'].values.astype(np.float32, copy=False)
+                    _, height, width = precip_values.shape
+                    tile_rows = max(1, R95PTOT_TILE_PIXELS // max(width, 1))
+                    
+                    # The downloader declares no precipitation units, so workers detect
+                    # them from the values; a split year needs one decision for the
+                    # whole grid, taken here
+                    scale = None
+                    if height > tile_rows:
+                        scale = detect_precipitation_scale(precip_values)
+                        year_results[year] = np.empty((height, width), dtype=np.float32)
+                    
+                    # Keep only coordinates and attributes for georeferencing the output
+                    datasets[year] = dataset.drop_vars('Precipitation')
+                    # Count every tile before submitting, so a tile that finishes early
+                    # cannot complete the year
+                    tile_starts = range(0, height, tile_rows)
+                    tiles_left[year] = len(tile_starts)
+                    for row_start in tile_starts:
+                        future = executor.submit(_calculate_r95ptot_for_year, year,
+                                                 precip_values[:, row_start:row_start + tile_rows],
+                                                 percentile_source, row_start, scale)
+                        future_to_tile[future] = (year, row_start)
+                        
+                        if len(future_to_tile) >= max_workers:
+                            done, _ = wait(future_to_tile, return_when=FIRST_COMPLETED)
+                            for done_future in done:
+                                save_future = self._collect_r95ptot_tile(
+                                    done_future, *future_to_tile.pop(done_future),
+                                    tiles_left, year_results, datasets, io_executor)
+                                if save_future is not None:
+                                    save_futures.append(save_future)
+                    del dataset, precip_values
                 
-                for future in as_completed(future_to_year):
-                    year = future_to_year[future]
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            results[year] = result
-                            info("R95pTOT calculated for year",
-                                 component="r95ptot_calculator",
-                                 year=year)
-                    except Exception as e:
-                        error("Failed to calculate R95pTOT for year",
-                              component="r95ptot_calculator",
-                              year=year,
-                              error=str(e))
-            
-            # Save results
-            if results:
-                success = self._save_r95ptot_results(results, datasets)
+                missing_years = set(range(int(start_year), int(end_year) + 1)) - downloaded_years
+                if missing_years:
+                    # Years were written as they completed; remove them so a failed
+                    # run leaves no partial output behind
+                    executor.shutdown(cancel_futures=True)
+                    wait(save_futures)
+                    self._remove_r95ptot_outputs(downloaded_years)
+                    error("Failed to get datasets for R95pTOT calculation",
+                          component="r95ptot_calculator",
+                          missing_years=sorted(missing_years))
+                    return False
                 
+                for future in as_completed(future_to_tile):
+                    save_future = self._collect_r95ptot_tile(
+                        future, *future_to_tile.pop(future),
+                        tiles_left, year_results, datasets, io_executor)
+                    if save_future is not None:
+                        save_futures.append(save_future)
+                    # The future holds the result too; drop it before blocking again
+                    del future
+                
+                computed_count = len(save_futures)
+                saved_count = sum(future.result() for future in save_futures)
+            
+            if computed_count:
                 # Clean up temporary download directory
                 try:
                     temp_dir = self.output_path / "temp_downloads"
@@ -114,7 +178,7 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
                             temp_dir=str(temp_dir),
                             error=str(e))
                 
-                return success
+                return saved_count == computed_count
             else:
                 error("No R95pTOT results calculated",
                       component="r95ptot_calculator")
@@ -164,152 +228,117 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
 
 
 
-    def _calculate_r95ptot_for_year(self, year: int, dataset: xr.Dataset, percentile_95: np.ndarray) -> Optional[np.ndarray]:
+    def _collect_r95ptot_tile(self, future: Future, year: int, row_start: int,
+                              tiles_left: dict, year_results: dict, datasets: dict,
+                              io_executor: ThreadPoolExecutor) -> Optional[Future]:
         """
-        Calculate R95pTOT values for a specific year using the base period percentile.
+        Collect a finished R95pTOT tile and queue its year for saving once complete.
         
         Args:
-            year: Year to calculate R95pTOT for
-            dataset: xarray Dataset with daily precipitation data
-            percentile_95: 2D array with 95th percentile values for each pixel
+            future: Completed future returned by _calculate_r95ptot_for_year
+            year: Year the tile belongs to
+            row_start: First row of the tile in the year's grid
+            tiles_left: Tiles still pending per year; a failed year is removed
+            year_results: Result grids being assembled for years split into tiles
+            datasets: Coordinates and attributes per year, popped once saved
+            io_executor: Writer pool the GeoTIFF is saved on
             
         Returns:
-            numpy array with R95pTOT values, or None if calculation fails
+            The future of _save_r95ptot_year if this tile completed its year,
+            otherwise None
         """
         try:
-            info("Calculating R95pTOT for year",
-                 component="r95ptot_calculator",
-                 year=year,
-                 dataset_shape=dataset['Precipitation'].shape)
-            
-            # Get precipitation data
-            precip_data = dataset['Precipitation']
-            precip_values = precip_data.values
-            
-            # Handle invalid values (CHIRPS often uses -9999 for no data)
-            invalid_mask = (precip_values < 0) | (precip_values == -9999) | (precip_values > 1000)
-            if np.any(invalid_mask):
-                precip_values = precip_values.copy()
-                precip_values[invalid_mask] = np.nan
-                invalid_count = np.sum(invalid_mask)
-                info(f"Converted {invalid_count} invalid values to NaN",
-                     component="r95ptot_calculator",
-                     year=year,
-                     invalid_count=invalid_count)
-            
-            # Check if values are in m/day and convert to mm/day
-            valid_values = precip_values[~np.isnan(precip_values)]
-            if len(valid_values) > 0 and np.max(valid_values) < 1 and np.max(valid_values) > 0:
-                precip_values = precip_values * 1000
-                info("Converted precipitation from m to mm",
-                     component="r95ptot_calculator",
-                     year=year)
-            
-            # Calculate R95pTOT for each pixel
-            r95ptot_values = self._calculate_extreme_precipitation_total(precip_values, percentile_95)
-            
-            # Handle cases where all values were NaN
-            all_nan_mask = np.all(np.isnan(precip_values), axis=0)
-            r95ptot_values[all_nan_mask] = np.nan
-            
-            info("R95pTOT calculation completed for year",
-                 component="r95ptot_calculator",
-                 year=year,
-                 max_r95ptot=np.nanmax(r95ptot_values),
-                 min_r95ptot=np.nanmin(r95ptot_values),
-                 mean_r95ptot=np.nanmean(r95ptot_values))
-            
-            return r95ptot_values
-            
+            result = future.result()
         except Exception as e:
             error("Failed to calculate R95pTOT for year",
                   component="r95ptot_calculator",
                   year=year,
                   error=str(e))
+            result = None
+        
+        if year not in tiles_left:
+            # Another tile of this year already failed
+            return None
+        if result is None:
+            del tiles_left[year]
+            year_results.pop(year, None)
+            datasets.pop(year, None)
             return None
-
-    def _calculate_extreme_precipitation_total(self, precip_values: np.ndarray, percentile_95: np.ndarray) -> np.ndarray:
-        """
-        Calculate total precipitation on days above 95th percentile for each pixel.
         
-        Args:
-            precip_values: 3D array (time, lat, lon) with precipitation values
-            percentile_95: 2D array (lat, lon) with 95th percentile values
-            
-        Returns:
-            2D array (lat, lon) with total extreme precipitation values
-        """
-        time_steps, height, width = precip_values.shape
-        r95ptot_result = np.zeros((height, width), dtype=np.float32)
+        tiles_left[year] -= 1
+        if year in year_results:
+            year_results[year][row_start:row_start + result.shape[0]] = result
+            if tiles_left[year]:
+                return None
+            result = year_results.pop(year)
+        del tiles_left[year]
         
-        # Process each pixel
-        for i in range(height):
-            for j in range(width):
-                pixel_precip = precip_values[:, i, j]
-                pixel_percentile = percentile_95[i, j]
-                
-                # Skip if percentile is NaN or all values are NaN
-                if np.isnan(pixel_percentile) or np.all(np.isnan(pixel_precip)):
-                    r95ptot_result[i, j] = np.nan
-                    continue
-                
-                # Count valid precipitation values
-                valid_precip = pixel_precip[~np.isnan(pixel_precip)]
-                
-                if len(valid_precip) == 0:
-                    r95ptot_result[i, j] = np.nan
-                    continue
-                
-                # Sum precipitation on days above 95th percentile
-                extreme_days_mask = valid_precip > pixel_percentile
-                extreme_precip = valid_precip[extreme_days_mask]
-                
-                # Total extreme precipitation
-                if len(extreme_precip) > 0:
-                    r95ptot_result[i, j] = np.sum(extreme_precip)
-                else:
-                    r95ptot_result[i, j] = 0.0
+        info("R95pTOT calculated for year",
+             component="r95ptot_calculator",
+             year=year)
         
-        return r95ptot_result
+        # Summary statistics cost three extra passes over the grid, so they
+        # are only computed when debug logging is enabled
+        if logging_manager.logger.isEnabledFor(logging.DEBUG):
+            debug("R95pTOT statistics for year",
+                  component="r95ptot_calculator",
+                  year=year,
+                  max_r95ptot=np.nanmax(result),
+                  min_r95ptot=np.nanmin(result),
+                  mean_r95ptot=np.nanmean(result))
+        
+        return io_executor.submit(self._save_r95ptot_year, year, result, datasets.pop(year))
 
-    def _save_r95ptot_results(self, results: dict, datasets: dict) -> bool:
+    def _save_r95ptot_year(self, year: int, r95ptot_data: np.ndarray, dataset: xr.Dataset) -> bool:
         """
-        Save R95pTOT calculation results to GeoTIFF files.
+        Save one year's R95pTOT result to a GeoTIFF file.
         
         Args:
-            results: Dictionary mapping years to R95pTOT arrays
-            datasets: Dictionary mapping years to xarray Datasets (for spatial info)
+            year: Year of the result
+            r95ptot_data: 2D array with R95pTOT values
+            dataset: xarray Dataset (for spatial info)
             
         Returns:
             bool: True if saving was successful
         """
         try:
-            info("Saving R95pTOT results",
-                 component="r95ptot_calculator",
-                 year_count=len(results))
+            output_filename = self._generate_climate_index_filename(year)
+            output_path = self.output_path / output_filename
             
-            # For each year, save as GeoTIFF
-            for year, r95ptot_data in results.items():
-                output_filename = self._generate_climate_index_filename(year)
-                output_path = self.output_path / output_filename
-                
-                # Save as GeoTIFF using spatial info from dataset
-                dataset = datasets[year]
-                self._save_as_geotiff(r95ptot_data, output_path, year, dataset)
-                
-                info("R95pTOT result saved",
-                     component="r95ptot_calculator",
-                     year=year,
-                     output_file=str(output_path))
+            # Save as GeoTIFF using spatial info from dataset
+            self._save_as_geotiff(r95ptot_data, output_path, year, dataset)
+            
+            info("R95pTOT result saved",
+                 component="r95ptot_calculator",
+                 year=year,
+                 output_file=str(output_path))
             
             return True
             
         except Exception as e:
             error("Failed to save R95pTOT results",
                   component="r95ptot_calculator",
+                  year=year,
                   error=str(e))
             return False
 
+    def _remove_r95ptot_outputs(self, years: set):
+        """
+        Delete the GeoTIFFs written for the given years, if any.
+        
+        Args:
+            years: Years whose output files should be removed
+        """
+        for year in sorted(years):
+            output_path = self.output_path / self._generate_climate_index_filename(year)
+            try:
+                output_path.unlink(missing_ok=True)
+            except Exception as e:
+                warning("Failed to remove partial R95pTOT output",
+                        component="r95ptot_calculator",
+                        output_file=str(output_path),
+                        error=str(e))
+
     def _save_as_geotiff(self, data: np.ndarray, output_path: Path, year: int, dataset: xr.Dataset):
         """
         Save data as GeoTIFF with proper georeferencing from dataset.
@@ -323,21 +352,18 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
         try:
             height, width = data.shape
             
-            # Get spatial information from dataset
-            lons = dataset.lon.values
-            lats = dataset.lat.values
-            
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
-            
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+            if self._cached_transform is None:
+                # Get spatial information from dataset
+                lons = dataset.lon.values
+                lats = dataset.lat.values
+                
+                # Get CRS from dataset attributes or use default
+                self._cached_crs = dataset.attrs.get('crs', 'EPSG:4326')
+                # Calculate transform from the pixel-centre coordinates
+                self._cached_transform = grid_transform(lons, lats, width, height)
             
-            # Get CRS from dataset attributes or use default
-            crs = dataset.attrs.get('crs', 'EPSG:4326')
+            transform = self._cached_transform
+            crs = self._cached_crs
             
             with rasterio.open(
                 output_path,
@@ -350,6 +376,11 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
                 crs=crs,
                 transform=transform,
                 compress='lzw',
+                predictor=3,
+                tiled=True,
+                blockxsize=256,
+                blockysize=256,
+                num_threads='ALL_CPUS',
                 nodata=np.nan
             ) as dst:
                 dst.write(data, 1)
@@ -390,71 +421,142 @@ class R95pTOTCalculator(PrecipitationPercentileCalculator):
         return False
 
 
-class R95pTOTDataProcessor:
+def _calculate_r95ptot_for_year(year: int, precip_values: np.ndarray,
+                                percentile_95: Union[np.ndarray, str, Path],
+                                row_start: int = 0,
+                                scale: Optional[float] = None) -> Optional[np.ndarray]:
     """
-    Helper class for R95pTOT data processing operations.
+    Calculate R95pTOT values for a specific year using the base period percentile.
     
-    This class could contain methods for:
-    - Loading daily precipitation data from various sources
-    - Calculating percentiles for base periods (wet days only)
-    - Data quality checks and filtering
-    - Coordinate system transformations
-    - Metadata handling
-    """
+    Defined at module level so it can run in a ProcessPoolExecutor worker. The
+    precipitation may cover the whole grid or a band of rows starting at row_start.
     
-    @staticmethod
-    def calculate_wet_day_percentile(daily_data: xr.Dataset, percentile: float = 95.0, threshold: float = 1.0) -> xr.Dataset:
-        """
-        Calculate percentile for wet days in base period daily precipitation data.
+    Args:
+        year: Year to calculate R95pTOT for
+        precip_values: 3D array (time, lat, lon) with daily precipitation
+        percentile_95: 2D array with 95th percentile values for the whole grid, or
+            the path of a .npy file holding it (loaded memory-mapped)
+        row_start: First grid row covered by precip_values
+        scale: Factor converting precipitation to mm/day, decided by the caller
+            for years split into tiles; detected from the values when None
         
-        Args:
-            daily_data: Daily precipitation dataset for base period
-            percentile: Percentile value to calculate (default 95.0)
-            threshold: Wet day threshold in mm (default 1.0 mm)
-            
-        Returns:
-            xr.Dataset: Percentile values for each grid point
-        """
-        # TODO: Implement wet day percentile calculation
-        # This would calculate the specified percentile for each grid point
-        # considering only wet days (precipitation >= threshold)
-        pass
-    
-    @staticmethod
-    def calculate_extreme_precipitation_totals(daily_data: xr.Dataset, thresholds: xr.Dataset) -> xr.Dataset:
-        """
-        Calculate total precipitation on days above threshold for each year.
+    Returns:
+        numpy array with R95pTOT values, or None if calculation fails
+    """
+    try:
+        info("Calculating R95pTOT for year",
+             component="r95ptot_calculator",
+             year=year,
+             row_start=row_start,
+             dataset_shape=precip_values.shape)
         
-        Args:
-            daily_data: Daily precipitation dataset
-            thresholds: Threshold values for each grid point
-            
-        Returns:
-            xr.Dataset: Annual total extreme precipitation values
-        """
-        # TODO: Implement extreme precipitation totals calculation
-        # This would:
-        # 1. Identify days above threshold for each grid point
-        # 2. Sum precipitation on these extreme days for each year
-        # 3. Return annual totals
-        pass
+        if isinstance(percentile_95, (str, Path)):
+            percentile_95 = np.load(percentile_95, mmap_mode='r')
+        # Keep the threshold comparison in float32 so days are never promoted to float64
+        percentile_95 = np.asarray(percentile_95[row_start:row_start + precip_values.shape[1]],
+                                   dtype=np.float32)
+        
+        # The array arrives pickled into this worker, so it is a private copy that
+        # can be modified in place (only converted if it is not float32 already)
+        precip_values = np.asarray(precip_values, dtype=np.float32)
+        
+        # Handle invalid values (CHIRPS often uses -9999 for no data, which the
+        # negative check already covers). Masks are built one day at a time into
+        # reused buffers, so no cube-sized boolean temporaries are allocated.
+        invalid_count = 0
+        invalid_day = np.empty(precip_values.shape[1:], dtype=bool)
+        above_range = np.empty_like(invalid_day)
+        for day_precip in precip_values:
+            np.less(day_precip, 0, out=invalid_day)
+            np.greater(day_precip, 1000, out=above_range)
+            np.logical_or(invalid_day, above_range, out=invalid_day)
+            day_invalid = np.count_nonzero(invalid_day)
+            if day_invalid:
+                np.putmask(day_precip, invalid_day, np.nan)
+                invalid_count += day_invalid
+        if invalid_count:
+            info(f"Converted {invalid_count} invalid values to NaN",
+                 component="r95ptot_calculator",
+                 year=year,
+                 invalid_count=invalid_count)
+        
+        # Check if values are in m/day and convert to mm/day. fmax skips NaN
+        # without allocating a compacted copy (and yields NaN if all are NaN).
+        if scale is None:
+            max_precip = np.fmax.reduce(precip_values, axis=None)
+            scale = 1000.0 if 0 < max_precip < 1 else 1.0
+        if scale != 1.0:
+            np.multiply(precip_values, scale, out=precip_values)
+            info("Converted precipitation from m to mm",
+                 component="r95ptot_calculator",
+                 year=year)
+        
+        # Calculate R95pTOT for each pixel (pixels with no valid day are set to NaN)
+        r95ptot_values = _calculate_extreme_precipitation_total(precip_values, percentile_95)
+        
+        info("R95pTOT calculation completed for year",
+             component="r95ptot_calculator",
+             year=year,
+             row_start=row_start)
+        
+        return r95ptot_values
+        
+    except Exception as e:
+        error("Failed to calculate R95pTOT for year",
+              component="r95ptot_calculator",
+              year=year,
+              row_start=row_start,
+              error=str(e))
+        return None
+
+
+def _calculate_extreme_precipitation_total(precip_values: np.ndarray, percentile_95: np.ndarray) -> np.ndarray:
+    """
+    Calculate total precipitation on days above 95th percentile for each pixel.
     
-    @staticmethod
-    def save_result(data: xr.Dataset, output_path: Path, metadata: dict) -> bool:
-        """
-        Save calculated results to file.
+    Following the ETCCDI definition only wet days (precipitation >= 1 mm)
+    count. The wet-day floor is folded into the threshold once per grid, so
+    each day is still a single comparison. Pixels whose percentile is NaN or
+    where every day is NaN are set to NaN.
+    
+    Args:
+        precip_values: 3D array (time, lat, lon) with precipitation values
+        percentile_95: 2D array (lat, lon) with 95th percentile values
         
-        Args:
-            data: Calculated indicator data
-            output_path: Output file path
-            metadata: Metadata to include in output
-            
-        Returns:
-            bool: True if successful
-        """
-        # TODO: Implement result saving
-        # This could save as:
-        # - GeoTIFF for raster data
-        # - NetCDF for multidimensional data
-        # - CSV for point data
-        pass
\ No newline at end of file
+    Returns:
+        2D array (lat, lon) with total extreme precipitation values
+    """
+    height, width = percentile_95.shape
+    r95ptot_result = np.zeros((height, width), dtype=np.float32)
+    
+    # A day above max(p95, 1 mm) is both wet and extreme; np.maximum keeps NaN
+    # percentiles as NaN so those pixels never accumulate. A wet-day percentile
+    # is never below 1 mm, so the floor only guards thresholds from other data
+    threshold = np.maximum(percentile_95, np.float32(WET_DAY_THRESHOLD))
+    
+    # Sweep the days over one band of rows at a time so the band's accumulator,
+    # threshold and mask stay in cache for the whole year instead of being
+    # streamed from memory once per day. NaN days compare False and are skipped;
+    # the same pass tracks which pixels have no valid day at all.
+    block_rows = max(1, SWEEP_BLOCK_PIXELS // max(width, 1))
+    all_nan = np.ones((height, width), dtype=bool)
+    extreme_day = np.empty((min(block_rows, height), width), dtype=bool)
+    nan_day = np.empty_like(extreme_day)
+    for row_start in range(0, height, block_rows):
+        rows = slice(row_start, row_start + block_rows)
+        result_block = r95ptot_result[rows]
+        threshold_block = threshold[rows]
+        all_nan_block = all_nan[rows]
+        extreme_block = extreme_day[:result_block.shape[0]]
+        nan_block = nan_day[:result_block.shape[0]]
+        for day_precip in precip_values[:, rows]:
+            np.greater(day_precip, threshold_block, out=extreme_block)
+            np.add(result_block, day_precip, out=result_block, where=extreme_block)
+            np.isnan(day_precip, out=nan_block)
+            np.logical_and(all_nan_block, nan_block, out=all_nan_block)
+    
+    # Pixels without a base period percentile have no defined threshold
+    r95ptot_result[np.isnan(percentile_95)] = np.nan
+    r95ptot_result[all_nan] = np.nan
+    
+    return r95ptot_result
@@ -1,14 +1,24 @@
 import os
+import shutil
+import logging
 import xarray as xr
 import numpy as np
 import rasterio
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from ..base_calculator import BaseIndicatorCalculator
 from ..data_downloader import IndicatorDataDownloader
-from ....tools import info, error, warning
+from ..processing_utils import SWEEP_BLOCK_PIXELS, detect_precipitation_scale, grid_transform
+from ..percentile_calculator import PercentileBasedCalculator
+from ....tools import info, error, warning, debug, logging_manager
+
+# RX1DAY is stored as int16 tenths of a millimetre (0-1000 mm fits in 0-10000),
+# with this sentinel marking pixels without valid data
+RX1DAY_SCALE_FACTOR = 0.1
+RX1DAY_STORED_UNITS = '0.1 mm'
+RX1DAY_NODATA = -1
 
 
 class RX1DAYCalculator(BaseIndicatorCalculator):
@@ -43,61 +53,58 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
             start_year = self.start_date[:4]
             end_year = self.end_date[:4]
             
-            # Setup data downloader
+            # Get GeoServer configuration for the downloads
             geoserver_config = self._get_geoserver_config()
             if not geoserver_config:
                 return False
             
-            downloader = IndicatorDataDownloader(
-                geoserver_workspace=geoserver_config['workspace'],
-                geoserver_layer=geoserver_config['layer'],
-                output_path=self.output_path / "temp_downloads",
-                variable="Precipitation",
-                year_range=(start_year, end_year),
-                parallel_downloads=4
-            )
-            
-            # Download data for all years
-            datasets = downloader.download_all_years()
+            # Stream years through a bounded pipeline: the next year downloads while
+            # earlier years are reduced in worker processes, and each result is handed
+            # to a writer thread as soon as it is ready. At most max_workers years are
+            # in flight, so peak memory does not grow with the number of years.
+            processed_count = 0
+            save_futures = []
+            max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor, \
+                    ThreadPoolExecutor(max_workers=4) as io_executor:
+                pending = {}
+                years = self._iter_precipitation_years(int(start_year), int(end_year),
+                                                       geoserver_config['workspace'],
+                                                       geoserver_config['layer'])
+                for year, dataset in years:
+                    processed_count += 1
+                    precip_values = dataset['Precipitation'].values
+                    
+                    future = executor.submit(_calculate_rx1day_for_year, year, precip_values)
+                    # Keep only coordinates and attributes for georeferencing the output
+                    pending[future] = (year, dataset.drop_vars('Precipitation'))
+                    del dataset, precip_values
+                    
+                    if len(pending) >= max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            save_future = self._save_rx1day_future(future, *pending.pop(future), io_executor)
+                            if save_future is not None:
+                                save_futures.append(save_future)
+                
+                for future in as_completed(pending):
+                    save_future = self._save_rx1day_future(future, *pending[future], io_executor)
+                    if save_future is not None:
+                        save_futures.append(save_future)
+                
+                saved_flags = [save_future.result() for save_future in save_futures]
             
-            if not datasets:
+            if processed_count == 0:
                 error("No data downloaded",
                       component="rx1day_calculator")
                 return False
             
-            # Calculate RX1DAY for each year in parallel
-            results = {}
-            max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_year = {
-                    executor.submit(self._calculate_rx1day_for_year, year, dataset): year
-                    for year, dataset in datasets.items()
-                }
-                
-                for future in as_completed(future_to_year):
-                    year = future_to_year[future]
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            results[year] = result
-                            info("RX1DAY calculated for year",
-                                 component="rx1day_calculator",
-                                 year=year)
-                    except Exception as e:
-                        error("Failed to calculate RX1DAY for year",
-                              component="rx1day_calculator",
-                              year=year,
-                              error=str(e))
-            
-            # Save results
-            if results:
-                success = self._save_rx1day_results(results, datasets)
-                
+            # Save status of every year that produced a result
+            if saved_flags:
                 # Clean up temporary download directory
                 try:
                     temp_dir = self.output_path / "temp_downloads"
                     if temp_dir.exists():
-                        import shutil
                         shutil.rmtree(temp_dir)
                         info("Temporary download directory cleaned up",
                              component="rx1day_calculator",
@@ -108,7 +115,7 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
                             temp_dir=str(temp_dir),
                             error=str(e))
                 
-                return success
+                return all(saved_flags)
             else:
                 error("No RX1DAY results calculated",
                       component="rx1day_calculator")
@@ -124,7 +131,6 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
             try:
                 temp_dir = self.output_path / "temp_downloads"
                 if temp_dir.exists():
-                    import shutil
                     shutil.rmtree(temp_dir)
                     info("Temporary download directory cleaned up after error",
                          component="rx1day_calculator",
@@ -156,102 +162,111 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
                   error=str(e))
             return {}
 
-    def _calculate_rx1day_for_year(self, year: int, dataset: xr.Dataset) -> Optional[np.ndarray]:
+    def _iter_precipitation_years(self, start_year: int, end_year: int,
+                                  workspace: str, layer: str) -> Iterator[Tuple[int, xr.Dataset]]:
+        """
+        Yield daily precipitation datasets for each year, reusing downloaded data.
+        
+        Years already downloaded in this process by the precipitation percentile
+        indicators (e.g. R95pTOT) are taken from their caches; only the remaining
+        years are downloaded, one range of consecutive years at a time.
+        
+        Args:
+            start_year: First year to yield
+            end_year: Last year to yield
+            workspace: GeoServer workspace of the precipitation layer
+            layer: GeoServer layer (mosaic name) with daily precipitation
+            
+        Yields:
+            Tuples of (year, xarray Dataset) for every year with data
+        """
+        cached_datasets = PercentileBasedCalculator.get_cached_datasets(self.country_code, "Precipitation")
+        year = start_year
+        while year <= end_year:
+            if year in cached_datasets:
+                info(f"Reusing downloaded data for year {year}",
+                     component="rx1day_calculator")
+                # Drop this call's reference so the year can be freed once processed
+                yield year, cached_datasets.pop(year)
+                year += 1
+                continue
+            
+            range_end = year
+            while range_end < end_year and range_end + 1 not in cached_datasets:
+                range_end += 1
+            downloader = IndicatorDataDownloader(
+                geoserver_workspace=workspace,
+                geoserver_layer=layer,
+                output_path=self.output_path / "temp_downloads",
+                variable="Precipitation",
+                year_range=(str(year), str(range_end)),
+                parallel_downloads=4
+            )
+            yield from downloader.iter_years()
+            year = range_end + 1
+
+    def _save_rx1day_future(self, future: Future, year: int, georef: xr.Dataset,
+                            io_executor: ThreadPoolExecutor) -> Optional[Future]:
         """
-        Calculate RX1DAY values for a specific year using xarray Dataset.
+        Collect a finished RX1DAY computation and queue its result for saving.
         
         Args:
-            year: Year to calculate RX1DAY for
-            dataset: xarray Dataset with daily precipitation data
+            future: Completed future returned by _calculate_rx1day_for_year
+            year: Year the future was computed for
+            georef: Dataset holding the coordinates and attributes for that year
+            io_executor: Writer pool the GeoTIFF is saved on
             
         Returns:
-            numpy array with RX1DAY values, or None if calculation fails
+            None if no RX1DAY result was calculated, otherwise the future of
+            _save_rx1day_year
         """
         try:
-            info("Calculating RX1DAY for year",
-                 component="rx1day_calculator",
-                 year=year,
-                 dataset_shape=dataset['Precipitation'].shape)
-            
-            # Get precipitation data
-            precip_data = dataset['Precipitation']
-            
-            # Convert precipitation to mm/day if needed (check units)
-            precip_values = precip_data.values
-            
-            # Handle invalid values (CHIRPS often uses -9999 for no data)
-            # Set negative values and typical no-data values to NaN
-            invalid_mask = (precip_values < 0) | (precip_values == -9999) | (precip_values > 1000)
-            if np.any(invalid_mask):
-                precip_values = precip_values.copy()  # Make a copy to avoid modifying original
-                precip_values[invalid_mask] = np.nan
-                invalid_count = np.sum(invalid_mask)
-                info(f"Converted {invalid_count} invalid values to NaN (negative, -9999, or > 1000mm)",
-                     component="rx1day_calculator",
-                     year=year,
-                     invalid_count=invalid_count)
-            
-            # Check if values are in m/day (very small values) and convert to mm/day
-            valid_values = precip_values[~np.isnan(precip_values)]
-            
-            # Calculate maximum precipitation for each pixel across all days
-            rx1day_values = np.nanmax(precip_values, axis=0)
-            
-            # Handle cases where all values were NaN
-            all_nan_mask = np.all(np.isnan(precip_values), axis=0)
-            rx1day_values[all_nan_mask] = np.nan
-            
-            info("RX1DAY calculation completed for year",
-                 component="rx1day_calculator",
-                 year=year,
-                 max_rx1day=np.nanmax(rx1day_values),
-                 min_rx1day=np.nanmin(rx1day_values),
-                 mean_rx1day=np.nanmean(rx1day_values))
-            
-            return rx1day_values
-            
+            result = future.result()
         except Exception as e:
             error("Failed to calculate RX1DAY for year",
                   component="rx1day_calculator",
                   year=year,
                   error=str(e))
             return None
+        
+        if result is None:
+            return None
+        
+        info("RX1DAY calculated for year",
+             component="rx1day_calculator",
+             year=year)
+        return io_executor.submit(self._save_rx1day_year, year, result, georef)
 
-    def _save_rx1day_results(self, results: dict, datasets: dict) -> bool:
+    def _save_rx1day_year(self, year: int, rx1day_data: np.ndarray, dataset: xr.Dataset) -> bool:
         """
-        Save RX1DAY calculation results to GeoTIFF files.
+        Save one year's RX1DAY result to a GeoTIFF file.
         
         Args:
-            results: Dictionary mapping years to RX1DAY arrays
-            datasets: Dictionary mapping years to xarray Datasets (for spatial info)
+            year: Year of the result
+            rx1day_data: 2D int16 array with RX1DAY values
+            dataset: xarray Dataset (for spatial info)
             
         Returns:
             bool: True if saving was successful
         """
         try:
-            info("Saving RX1DAY results",
-                 component="rx1day_calculator",
-                 year_count=len(results))
+            output_filename = self._generate_climate_index_filename(year)
+            output_path = self.output_path / output_filename
             
-            # For each year, save as GeoTIFF
-            for year, rx1day_data in results.items():
-                output_filename = self._generate_climate_index_filename(year)
-                output_path = self.output_path / output_filename
-                
-                # Save as GeoTIFF using spatial info from dataset
-                dataset = datasets[year]
-                self._save_as_geotiff(rx1day_data, output_path, year, dataset)
-                
-                info("RX1DAY result saved",
-                     component="rx1day_calculator",
-                     year=year,
-                     output_file=str(output_path))
+            # Save as GeoTIFF using spatial info from dataset
+            self._save_as_geotiff(rx1day_data, output_path, year, dataset)
+            
+            info("RX1DAY result saved",
+                 component="rx1day_calculator",
+                 year=year,
+                 output_file=str(output_path))
             
             return True
             
         except Exception as e:
             error("Failed to save RX1DAY results",
                   component="rx1day_calculator",
+                  year=year,
                   error=str(e))
             return False
 
@@ -260,7 +275,7 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
         Save data as GeoTIFF with proper georeferencing from dataset.
         
         Args:
-            data: 2D numpy array with RX1DAY values
+            data: 2D int16 array with RX1DAY values in units of RX1DAY_SCALE_FACTOR mm
             output_path: Output file path
             year: Year for metadata
             dataset: xarray Dataset for spatial information
@@ -272,14 +287,8 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
             lons = dataset.lon.values
             lats = dataset.lat.values
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
-            
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
             
             # Get CRS from dataset attributes or use default
             crs = dataset.attrs.get('crs', 'EPSG:4326')
@@ -291,20 +300,37 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
                 height=height,
                 width=width,
                 count=1,
-                dtype=data.dtype,
+                dtype='int16',
                 crs=crs,
                 transform=transform,
-                compress='lzw',
-                nodata=np.nan
+                compress='zstd',
+                zstd_level=3,
+                predictor=2,
+                num_threads='ALL_CPUS',
+                tiled=True,
+                blockxsize=512,
+                blockysize=512,
+                BIGTIFF='IF_SAFER',
+                nodata=RX1DAY_NODATA
             ) as dst:
-                dst.write(data, 1)
+                # Write tile by tile, so each window maps to one on-disk tile
+                data = data.astype(np.int16, copy=False)
+                for _, window in dst.block_windows(1):
+                    dst.write(data[window.toslices()], 1, window=window)
+                # Clients that ignore the scale (e.g. GeoServer styles) read the raw
+                # integers, so the units and description name the stored unit too
+                dst.scales = (RX1DAY_SCALE_FACTOR,)
+                dst.units = (RX1DAY_STORED_UNITS,)
+                dst.set_band_description(1, f'RX1DAY ({RX1DAY_STORED_UNITS}); multiply by '
+                                            f'{RX1DAY_SCALE_FACTOR} for mm')
                 
                 # Add metadata
                 dst.update_tags(
                     INDICATOR='RX1DAY',
                     YEAR=str(year),
                     DESCRIPTION='Maximum daily precipitation',
-                    UNITS='mm',
+                    UNITS=RX1DAY_STORED_UNITS,
+                    SCALE_FACTOR=str(RX1DAY_SCALE_FACTOR),
                     CREATED=datetime.now().isoformat()
                 )
                 
@@ -334,6 +360,119 @@ class RX1DAYCalculator(BaseIndicatorCalculator):
         return False
 
 
+def _calculate_rx1day_for_year(year: int, precip_values: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Calculate RX1DAY values for a specific year.
+    
+    Defined at module level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        year: Year to calculate RX1DAY for
+        precip_values: 3D array (time, lat, lon) with daily precipitation
+        
+    Returns:
+        numpy array with RX1DAY values, or None if calculation fails
+    """
+    try:
+        info("Calculating RX1DAY for year",
+             component="rx1day_calculator",
+             year=year,
+             dataset_shape=precip_values.shape)
+        
+        # Fold the validity check into a running maximum over the days, so the
+        # cube is read once and never copied. Only values within 0-1000 mm are
+        # valid. The maximum starts at -inf and is taken with fmax, which
+        # ignores NaN, so on most days no mask is needed at all: negative values
+        # such as -9999 (CHIRPS no data) can only win while a pixel has no valid
+        # day, and any maximum still below zero is turned into NaN at the end.
+        # Only days with a value above 1000 mm fall back to a masked maximum.
+        # The masks are built in preallocated buffers, so nothing is allocated
+        # per day, and the days are swept over one band of rows at a time so the
+        # band's maximum and masks stay in cache for the whole year.
+        _, height, width = precip_values.shape
+        rx1day_values = np.full((height, width), -np.inf, dtype=np.float32)
+        block_rows = max(1, SWEEP_BLOCK_PIXELS // max(width, 1))
+        valid_buffer = np.empty((min(block_rows, height), width), dtype=bool)
+        check_buffer = np.empty_like(valid_buffer)
+        valid_count = 0
+        for row_start in range(0, height, block_rows):
+            rows = slice(row_start, row_start + block_rows)
+            max_block = rx1day_values[rows]
+            valid_day = valid_buffer[:max_block.shape[0]]
+            check_day = check_buffer[:max_block.shape[0]]
+            for day_precip in precip_values[:, rows]:
+                np.greater_equal(day_precip, 0, out=valid_day)
+                valid_count += np.count_nonzero(valid_day)
+                np.greater(day_precip, 1000, out=check_day)
+                if check_day.any():
+                    valid_count -= np.count_nonzero(check_day)
+                    np.logical_not(check_day, out=check_day)
+                    np.logical_and(valid_day, check_day, out=valid_day)
+                    np.fmax(max_block, day_precip, out=max_block, where=valid_day)
+                else:
+                    np.fmax(max_block, day_precip, out=max_block)
+        np.putmask(rx1day_values, rx1day_values < 0, np.nan)
+        
+        # Quantization assumes mm, so convert data in m/day first. The maximum
+        # of the per-pixel maxima is the maximum valid value of the whole year,
+        # so the units can be detected from the result grid without another
+        # pass over the cube.
+        scale = detect_precipitation_scale(rx1day_values[np.newaxis])
+        if scale != 1.0:
+            info("Converting precipitation from m to mm",
+                 component="rx1day_calculator",
+                 year=year)
+            rx1day_values *= scale
+        
+        invalid_count = precip_values.size - valid_count
+        if invalid_count:
+            info(f"Ignored {invalid_count} missing or invalid values (NaN, negative, -9999, or > 1000mm)",
+                 component="rx1day_calculator",
+                 year=year,
+                 invalid_count=invalid_count)
+        
+        info("RX1DAY calculation completed for year",
+             component="rx1day_calculator",
+             year=year)
+        
+        # Summary statistics cost three extra passes over the grid, so they
+        # are only computed when debug logging is enabled
+        if logging_manager.logger.isEnabledFor(logging.DEBUG):
+            debug("RX1DAY statistics for year",
+                  component="rx1day_calculator",
+                  year=year,
+                  max_rx1day=np.nanmax(rx1day_values),
+                  min_rx1day=np.nanmin(rx1day_values),
+                  mean_rx1day=np.nanmean(rx1day_values))
+        
+        return _quantize_rx1day(rx1day_values)
+        
+    except Exception as e:
+        error("Failed to calculate RX1DAY for year",
+              component="rx1day_calculator",
+              year=year,
+              error=str(e))
+        return None
+
+
+def _quantize_rx1day(rx1day_values: np.ndarray) -> np.ndarray:
+    """
+    Quantize RX1DAY values in mm to int16 multiples of RX1DAY_SCALE_FACTOR.
+    
+    Args:
+        rx1day_values: 2D float array with RX1DAY values (NaN where there is no data);
+            used as scratch space
+        
+    Returns:
+        int16 array with RX1DAY_NODATA where there is no data
+    """
+    nodata_mask = np.isnan(rx1day_values)
+    np.divide(rx1day_values, RX1DAY_SCALE_FACTOR, out=rx1day_values)
+    np.rint(rx1day_values, out=rx1day_values)
+    rx1day_values[nodata_mask] = RX1DAY_NODATA
+    return rx1day_values.astype(np.int16)
+
+
 class RX1DAYDataProcessor:
     """
     Helper class for RX1DAY data processing operations.
@@ -1,15 +1,24 @@
 import os
+import shutil
+import logging
 import xarray as xr
 import numpy as np
 import rasterio
+from rasterio.enums import Resampling
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from ..base_calculator import BaseIndicatorCalculator
 from ..data_downloader import IndicatorDataDownloader
-from ....tools import info, error, warning
+from ..processing_utils import SWEEP_BLOCK_PIXELS, detect_precipitation_scale, grid_transform
+from ....tools import info, error, warning, debug, logging_manager
 
+# Days per block when masking invalid values, bounding the size of the mask
+SDII_MASK_BLOCK_DAYS = 8
+
+# Overview levels written to the SDII GeoTIFFs
+SDII_OVERVIEW_FACTORS = [2, 4, 8, 16]
 
 class SDIICalculator(BaseIndicatorCalculator):
     """
@@ -32,6 +41,8 @@ class SDIICalculator(BaseIndicatorCalculator):
         Returns:
             bool: True if calculation was successful, False otherwise
         """
+        # Directory the downloader works in, removed again once we are done
+        temp_dir = self.output_path / "temp_downloads"
         try:
             info("Starting SDII annual calculation",
                  component="sdii_calculator",
@@ -51,64 +62,47 @@ class SDIICalculator(BaseIndicatorCalculator):
             downloader = IndicatorDataDownloader(
                 geoserver_workspace=geoserver_config['workspace'],
                 geoserver_layer=geoserver_config['layer'],
-                output_path=self.output_path / "temp_downloads",
+                output_path=temp_dir,
                 variable="Precipitation",
                 year_range=(start_year, end_year),
                 parallel_downloads=4
             )
             
-            # Download data for all years
-            datasets = downloader.download_all_years()
-            
-            if not datasets:
-                error("No data downloaded",
-                      component="sdii_calculator")
-                return False
-            
-            # Calculate SDII for each year in parallel
+            # Calculate SDII for each year in parallel worker processes. Years are
+            # submitted as the downloader yields them, so later downloads overlap
+            # with the computation of earlier years; at most max_workers years are
+            # in flight, so peak memory does not grow with the number of years.
+            # Precipitation is sent as float32, which is ample precision for
+            # 0-1000 mm and halves what is pickled to the workers and swept when
+            # the source is float64.
             results = {}
+            datasets = {}
             max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_year = {
-                    executor.submit(self._calculate_sdii_for_year, year, dataset): year
-                    for year, dataset in datasets.items()
-                }
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = {}
+                for year, dataset in downloader.iter_years():
+                    precip_values = dataset['Precipitation'].values.astype(np.float32, copy=False)
+                    pending[executor.submit(_calculate_sdii_for_year, year, precip_values)] = year
+                    # Keep only coordinates and attributes for georeferencing the output
+                    datasets[year] = dataset.drop_vars('Precipitation')
+                    del dataset, precip_values
+                    
+                    if len(pending) >= max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._collect_sdii_future(future, pending.pop(future), results)
+                
+                if not datasets:
+                    error("No data downloaded",
+                          component="sdii_calculator")
+                    return False
                 
-                for future in as_completed(future_to_year):
-                    year = future_to_year[future]
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            results[year] = result
-                            info("SDII calculated for year",
-                                 component="sdii_calculator",
-                                 year=year)
-                    except Exception as e:
-                        error("Failed to calculate SDII for year",
-                              component="sdii_calculator",
-                              year=year,
-                              error=str(e))
+                for future in as_completed(pending):
+                    self._collect_sdii_future(future, pending[future], results)
             
             # Save results
             if results:
-                success = self._save_sdii_results(results, datasets)
-                
-                # Clean up temporary download directory
-                try:
-                    temp_dir = self.output_path / "temp_downloads"
-                    if temp_dir.exists():
-                        import shutil
-                        shutil.rmtree(temp_dir)
-                        info("Temporary download directory cleaned up",
-                             component="sdii_calculator",
-                             temp_dir=str(temp_dir))
-                except Exception as e:
-                    warning("Failed to clean up temporary directory",
-                            component="sdii_calculator",
-                            temp_dir=str(temp_dir),
-                            error=str(e))
-                
-                return success
+                return self._save_sdii_results(results, datasets)
             else:
                 error("No SDII results calculated",
                       component="sdii_calculator")
@@ -119,23 +113,21 @@ class SDIICalculator(BaseIndicatorCalculator):
                   component="sdii_calculator",
                   indicator_code=self.INDICATOR_CODE,
                   error=str(e))
-            
-            # Clean up temporary download directory even on error
+            return False
+        
+        finally:
+            # Clean up temporary download directory, whatever the outcome
             try:
-                temp_dir = self.output_path / "temp_downloads"
                 if temp_dir.exists():
-                    import shutil
                     shutil.rmtree(temp_dir)
-                    info("Temporary download directory cleaned up after error",
+                    info("Temporary download directory cleaned up",
                          component="sdii_calculator",
                          temp_dir=str(temp_dir))
-            except Exception as cleanup_error:
-                warning("Failed to clean up temporary directory after error",
+            except Exception as e:
+                warning("Failed to clean up temporary directory",
                         component="sdii_calculator",
                         temp_dir=str(temp_dir),
-                        error=str(cleanup_error))
-            
-            return False
+                        error=str(e))
 
     def _get_geoserver_config(self) -> dict:
         """Get GeoServer configuration for precipitation data"""
@@ -156,119 +148,27 @@ class SDIICalculator(BaseIndicatorCalculator):
                   error=str(e))
             return {}
 
-    def _calculate_sdii_for_year(self, year: int, dataset: xr.Dataset) -> Optional[np.ndarray]:
+    def _collect_sdii_future(self, future: Future, year: int, results: dict):
         """
-        Calculate SDII values for a specific year using xarray Dataset.
+        Store the result of a finished SDII computation.
         
         Args:
-            year: Year to calculate SDII for
-            dataset: xarray Dataset with daily precipitation data
-            
-        Returns:
-            numpy array with SDII values, or None if calculation fails
+            future: Completed future returned by _calculate_sdii_for_year
+            year: Year the future was computed for
+            results: Dictionary of results per year, updated in place
         """
         try:
-            info("Calculating SDII for year",
-                 component="sdii_calculator",
-                 year=year,
-                 dataset_shape=dataset['Precipitation'].shape)
-            
-            # Get precipitation data
-            precip_data = dataset['Precipitation']
-            
-            # Convert precipitation to mm/day if needed (check units)
-            precip_values = precip_data.values
-            
-            # Handle invalid values (CHIRPS often uses -9999 for no data)
-            # Set negative values and typical no-data values to NaN
-            invalid_mask = (precip_values < 0) | (precip_values == -9999) | (precip_values > 1000)
-            if np.any(invalid_mask):
-                precip_values = precip_values.copy()  # Make a copy to avoid modifying original
-                precip_values[invalid_mask] = np.nan
-                invalid_count = np.sum(invalid_mask)
-                info(f"Converted {invalid_count} invalid values to NaN (negative, -9999, or > 1000mm)",
-                     component="sdii_calculator",
-                     year=year,
-                     invalid_count=invalid_count)
-            
-            # Check if values are in m/day (very small values) and convert to mm/day
-            valid_values = precip_values[~np.isnan(precip_values)]
-            if len(valid_values) > 0 and np.max(valid_values) < 1 and np.max(valid_values) > 0:
-                precip_values = precip_values * 1000  # Convert from m to mm
-                info("Converted precipitation from m to mm",
+            result = future.result()
+            if result is not None:
+                results[year] = result
+                info("SDII calculated for year",
                      component="sdii_calculator",
                      year=year)
-            
-            # Calculate SDII for each pixel
-            sdii_values = self._calculate_simple_daily_intensity(precip_values)
-            
-            # Handle cases where all values were NaN
-            all_nan_mask = np.all(np.isnan(precip_values), axis=0)
-            sdii_values[all_nan_mask] = np.nan
-            
-            info("SDII calculation completed for year",
-                 component="sdii_calculator",
-                 year=year,
-                 max_sdii=np.nanmax(sdii_values),
-                 min_sdii=np.nanmin(sdii_values),
-                 mean_sdii=np.nanmean(sdii_values))
-            
-            return sdii_values
-            
         except Exception as e:
             error("Failed to calculate SDII for year",
                   component="sdii_calculator",
                   year=year,
                   error=str(e))
-            return None
-
-    def _calculate_simple_daily_intensity(self, precip_values: np.ndarray) -> np.ndarray:
-        """
-        Calculate Simple Daily Intensity Index for each pixel.
-        
-        SDII = total precipitation on wet days / number of wet days
-        where wet day is defined as a day with precipitation ≥ 1 mm
-        
-        Args:
-            precip_values: 3D array (time, lat, lon) with precipitation values
-            
-        Returns:
-            2D array (lat, lon) with SDII values
-        """
-        time_steps, height, width = precip_values.shape
-        sdii_result = np.zeros((height, width), dtype=np.float32)
-        
-        # Process each pixel
-        for i in range(height):
-            for j in range(width):
-                pixel_precip = precip_values[:, i, j]
-                
-                # Skip if all values are NaN
-                if np.all(np.isnan(pixel_precip)):
-                    sdii_result[i, j] = np.nan
-                    continue
-                
-                # Find wet days (precipitation ≥ 1 mm)
-                # Handle NaN values by excluding them
-                valid_precip = pixel_precip[~np.isnan(pixel_precip)]
-                
-                if len(valid_precip) == 0:
-                    sdii_result[i, j] = np.nan
-                    continue
-                
-                # Identify wet days
-                wet_days_mask = valid_precip >= 1.0
-                wet_days_precip = valid_precip[wet_days_mask]
-                
-                # Calculate SDII
-                if len(wet_days_precip) == 0:
-                    # No wet days in the year
-                    sdii_result[i, j] = 0.0
-                else:
-                    # Average precipitation on wet days
-                    sdii_result[i, j] = np.sum(wet_days_precip) / len(wet_days_precip)
-        
-        return sdii_result
 
     def _save_sdii_results(self, results: dict, datasets: dict) -> bool:
         """
@@ -286,21 +186,31 @@ class SDIICalculator(BaseIndicatorCalculator):
                  component="sdii_calculator",
                  year_count=len(results))
             
-            # For each year, save as GeoTIFF
-            for year, sdii_data in results.items():
-                output_filename = self._generate_climate_index_filename(year)
-                output_path = self.output_path / output_filename
-                
-                # Save as GeoTIFF using spatial info from dataset
-                dataset = datasets[year]
-                self._save_as_geotiff(sdii_data, output_path, year, dataset)
-                
-                info("SDII result saved",
-                     component="sdii_calculator",
-                     year=year,
-                     output_file=str(output_path))
+            # Every year comes from the same GeoServer layer, so the grid is the
+            # same: take the transform and CRS from the first year only
+            first_year = next(iter(results))
+            dataset = datasets[first_year]
+            height, width = results[first_year].shape
             
-            return True
+            lons = dataset.lon.values
+            lats = dataset.lat.values
+            
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
+            
+            # Get CRS from dataset attributes or use default
+            crs = dataset.attrs.get('crs', 'EPSG:4326')
+            
+            # Save each year as GeoTIFF concurrently; GDAL releases the GIL while
+            # compressing and writing, so the years' writes overlap
+            with ThreadPoolExecutor(max_workers=4) as io_executor:
+                save_futures = [
+                    io_executor.submit(self._save_sdii_year, year, sdii_data, transform, crs)
+                    for year, sdii_data in results.items()
+                ]
+                saved_flags = [future.result() for future in save_futures]
+            
+            return all(saved_flags)
             
         except Exception as e:
             error("Failed to save SDII results",
@@ -308,34 +218,61 @@ class SDIICalculator(BaseIndicatorCalculator):
                   error=str(e))
             return False
 
-    def _save_as_geotiff(self, data: np.ndarray, output_path: Path, year: int, dataset: xr.Dataset):
+    def _save_sdii_year(self, year: int, sdii_data: np.ndarray, transform: rasterio.Affine, crs: str) -> bool:
         """
-        Save data as GeoTIFF with proper georeferencing from dataset.
+        Save one year's SDII result to a GeoTIFF file.
         
         Args:
-            data: 2D numpy array with SDII values
-            output_path: Output file path
-            year: Year for metadata
-            dataset: xarray Dataset for spatial information
+            year: Year of the result
+            sdii_data: 2D array with SDII values
+            transform: Affine transform of the output grid
+            crs: CRS of the output grid
+            
+        Returns:
+            bool: True if saving was successful
         """
         try:
-            height, width = data.shape
+            output_filename = self._generate_climate_index_filename(year)
+            output_path = self.output_path / output_filename
+            
+            if not self._save_as_geotiff(sdii_data, output_path, year, transform, crs):
+                error("Failed to save SDII result",
+                      component="sdii_calculator",
+                      year=year,
+                      output_file=str(output_path))
+                return False
             
-            # Get spatial information from dataset
-            lons = dataset.lon.values
-            lats = dataset.lat.values
+            info("SDII result saved",
+                 component="sdii_calculator",
+                 year=year,
+                 output_file=str(output_path))
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
+            return True
             
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+        except Exception as e:
+            error("Failed to save SDII result",
+                  component="sdii_calculator",
+                  year=year,
+                  error=str(e))
+            return False
+
+    def _save_as_geotiff(self, data: np.ndarray, output_path: Path, year: int,
+                         transform: rasterio.Affine, crs: str) -> bool:
+        """
+        Save data as GeoTIFF with the given georeferencing.
+        
+        Args:
+            data: 2D numpy array with SDII values
+            output_path: Output file path
+            year: Year for metadata
+            transform: Affine transform of the output grid
+            crs: CRS of the output grid
             
-            # Get CRS from dataset attributes or use default
-            crs = dataset.attrs.get('crs', 'EPSG:4326')
+        Returns:
+            bool: True once the file is written; failures are raised
+        """
+        try:
+            height, width = data.shape
             
             with rasterio.open(
                 output_path,
@@ -347,11 +284,26 @@ class SDIICalculator(BaseIndicatorCalculator):
                 dtype=data.dtype,
                 crs=crs,
                 transform=transform,
-                compress='lzw',
+                compress='deflate',
+                predictor=3,
+                tiled=True,
+                blockxsize=512,
+                blockysize=512,
+                num_threads='ALL_CPUS',
+                BIGTIFF='IF_SAFER',
                 nodata=np.nan
             ) as dst:
                 dst.write(data, 1)
                 
+                # Add averaged overviews (cloud-optimized layout), so readers can
+                # fetch reduced resolutions without decoding the full raster.
+                # Levels no larger than one tile add nothing and are skipped.
+                overview_factors = [factor for factor in SDII_OVERVIEW_FACTORS
+                                    if max(height, width) // factor > 512]
+                if overview_factors:
+                    dst.build_overviews(overview_factors, Resampling.average)
+                    dst.update_tags(ns='rio_overview', resampling='average')
+                
                 # Add metadata
                 dst.update_tags(
                     INDICATOR='SDII',
@@ -366,6 +318,8 @@ class SDIICalculator(BaseIndicatorCalculator):
                  output_path=str(output_path),
                  year=year,
                  shape=data.shape)
+            
+            return True
                 
         except Exception as e:
             error("Failed to save SDII data as GeoTIFF",
@@ -387,6 +341,148 @@ class SDIICalculator(BaseIndicatorCalculator):
         return False
 
 
+def _calculate_sdii_for_year(year: int, precip_values: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Calculate SDII values for a specific year.
+    
+    Defined at module level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        year: Year to calculate SDII for
+        precip_values: 3D array (time, lat, lon) with daily precipitation; invalid
+            values are set to NaN in place (workers receive their own copy)
+        
+    Returns:
+        numpy array with SDII values, or None if calculation fails
+    """
+    try:
+        info("Calculating SDII for year",
+             component="sdii_calculator",
+             year=year,
+             dataset_shape=precip_values.shape)
+        
+        # Handle invalid values (CHIRPS often uses -9999 for no data)
+        # Set negative values (which covers -9999) and values above 1000 mm to NaN.
+        # The mask is built a block of days at a time, so its size is bounded by
+        # the block instead of the whole cube, and both predicates are written
+        # into two buffers reused for every block.
+        invalid_count = 0
+        mask_shape = (min(SDII_MASK_BLOCK_DAYS, precip_values.shape[0]),) + precip_values.shape[1:]
+        invalid_buffer = np.empty(mask_shape, dtype=bool)
+        check_buffer = np.empty_like(invalid_buffer)
+        for day_start in range(0, precip_values.shape[0], SDII_MASK_BLOCK_DAYS):
+            precip_block = precip_values[day_start:day_start + SDII_MASK_BLOCK_DAYS]
+            invalid_mask = invalid_buffer[:len(precip_block)]
+            check_mask = check_buffer[:len(precip_block)]
+            np.less(precip_block, 0, out=invalid_mask)
+            np.greater(precip_block, 1000, out=check_mask)
+            np.logical_or(invalid_mask, check_mask, out=invalid_mask)
+            block_invalid_count = np.count_nonzero(invalid_mask)
+            if block_invalid_count:
+                np.putmask(precip_block, invalid_mask, np.nan)
+                invalid_count += block_invalid_count
+        if invalid_count:
+            info(f"Converted {invalid_count} invalid values to NaN (negative, -9999, or > 1000mm)",
+                 component="sdii_calculator",
+                 year=year,
+                 invalid_count=invalid_count)
+        
+        # Check if values are in m/day (very small values); the conversion to
+        # mm/day is applied inside the kernel instead of rescaling the cube
+        scale = detect_precipitation_scale(precip_values)
+        if scale != 1.0:
+            info("Converting precipitation from m to mm",
+                 component="sdii_calculator",
+                 year=year)
+        
+        # Calculate SDII for each pixel (pixels where all values are NaN are set
+        # to NaN by the kernel's sweep)
+        sdii_values = _calculate_simple_daily_intensity(precip_values, scale)
+        
+        info("SDII calculation completed for year",
+             component="sdii_calculator",
+             year=year)
+        
+        # Summary statistics cost three extra passes over the grid, so they
+        # are only computed when debug logging is enabled
+        if logging_manager.logger.isEnabledFor(logging.DEBUG):
+            debug("SDII statistics for year",
+                  component="sdii_calculator",
+                  year=year,
+                  max_sdii=np.nanmax(sdii_values),
+                  min_sdii=np.nanmin(sdii_values),
+                  mean_sdii=np.nanmean(sdii_values))
+        
+        return sdii_values
+        
+    except Exception as e:
+        error("Failed to calculate SDII for year",
+              component="sdii_calculator",
+              year=year,
+              error=str(e))
+        return None
+
+
+def _calculate_simple_daily_intensity(precip_values: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """
+    Calculate Simple Daily Intensity Index for each pixel.
+    
+    SDII = total precipitation on wet days / number of wet days
+    where wet day is defined as a day with precipitation ≥ 1 mm
+    
+    Args:
+        precip_values: 3D array (time, lat, lon) with precipitation values
+        scale: Factor converting precip_values to mm/day (applied to the
+            wet-day threshold and the totals rather than to the cube)
+        
+    Returns:
+        2D array (lat, lon) with SDII values, NaN where every day is NaN
+    """
+    _, height, width = precip_values.shape
+    wet_day_total = np.zeros((height, width), dtype=np.float32)
+    wet_day_count = np.zeros((height, width), dtype=np.int16)
+    all_nan = np.ones((height, width), dtype=bool)
+    
+    # Fuse the wet-day test, sum and count into one pass over the cube, one
+    # day at a time, so no cube-sized mask or temporary is ever allocated.
+    # NaN compares False, so missing days are never counted as wet. A day's
+    # wet-day contribution is precip * wet with NaN (NaN * False) turned to 0
+    # by fmax, which is much cheaper than a masked add. Days are swept over
+    # one band of rows at a time so the band's accumulators stay in cache.
+    block_rows = max(1, SWEEP_BLOCK_PIXELS // max(width, 1))
+    wet_day = np.empty((min(block_rows, height), width), dtype=bool)
+    nan_day = np.empty_like(wet_day)
+    wet_precip = np.empty(wet_day.shape, dtype=np.float32)
+    wet_day_threshold = np.float32(1.0 / scale)
+    for row_start in range(0, height, block_rows):
+        rows = slice(row_start, row_start + block_rows)
+        total_block = wet_day_total[rows]
+        count_block = wet_day_count[rows]
+        all_nan_block = all_nan[rows]
+        wet_block = wet_day[:total_block.shape[0]]
+        nan_block = nan_day[:total_block.shape[0]]
+        precip_block = wet_precip[:total_block.shape[0]]
+        for day_precip in precip_values[:, rows]:
+            np.greater_equal(day_precip, wet_day_threshold, out=wet_block)
+            np.add(count_block, wet_block, out=count_block)
+            np.multiply(day_precip, wet_block, out=precip_block)
+            np.fmax(precip_block, 0, out=precip_block)
+            np.add(total_block, precip_block, out=total_block)
+            np.isnan(day_precip, out=nan_block)
+            np.logical_and(all_nan_block, nan_block, out=all_nan_block)
+    
+    # Average precipitation on wet days; pixels without wet days get 0
+    if scale != 1.0:
+        wet_day_total *= np.float32(scale)
+    sdii_result = np.zeros((height, width), dtype=np.float32)
+    np.divide(wet_day_total, wet_day_count, out=sdii_result, where=wet_day_count > 0)
+    
+    # Pixels where every day is NaN have no data
+    sdii_result[all_nan] = np.nan
+    
+    return sdii_result
+
+
 class SDIIDataProcessor:
     """
     Helper class for SDII data processing operations.
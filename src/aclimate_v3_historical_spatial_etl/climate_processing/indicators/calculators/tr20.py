@@ -1,14 +1,24 @@
 import os
+import shutil
+import logging
 import xarray as xr
 import numpy as np
 import rasterio
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from ..base_calculator import BaseIndicatorCalculator
 from ..data_downloader import IndicatorDataDownloader
-from ....tools import info, error, warning
+from ..processing_utils import SWEEP_BLOCK_PIXELS, KELVIN_OFFSET, grid_transform, is_kelvin
+from ....tools import info, error, warning, debug, logging_manager
+
+# Warm-night threshold in °C
+TR20_THRESHOLD_CELSIUS = 20.0
+
+# TR20 is a whole number of days (0-366), so results are stored as int16 with
+# this sentinel marking pixels without valid data, as for CDD
+TR20_NODATA = -1
 
 
 class TR20Calculator(BaseIndicatorCalculator):
@@ -32,6 +42,8 @@ class TR20Calculator(BaseIndicatorCalculator):
         Returns:
             bool: True if calculation was successful, False otherwise
         """
+        # Directory the downloader works in, removed again once we are done
+        temp_dir = self.output_path / "temp_downloads"
         try:
             info("Starting TR20 annual calculation",
                  component="tr20_calculator",
@@ -51,64 +63,50 @@ class TR20Calculator(BaseIndicatorCalculator):
             downloader = IndicatorDataDownloader(
                 geoserver_workspace=geoserver_config['workspace'],
                 geoserver_layer=geoserver_config['layer'],
-                output_path=self.output_path / "temp_downloads",
+                output_path=temp_dir,
                 variable="2m_Minimum_Temperature",
                 year_range=(start_year, end_year),
                 parallel_downloads=4
             )
             
-            # Download data for all years
-            datasets = downloader.download_all_years()
-            
-            if not datasets:
-                error("No data downloaded",
-                      component="tr20_calculator")
-                return False
-            
-            # Calculate TR20 for each year in parallel
+            # Calculate TR20 for each year in parallel worker processes; the count
+            # is CPU-bound NumPy work, so threads would serialize on the GIL.
+            # Years are submitted as the downloader yields them, so later
+            # downloads overlap with the computation of earlier years; at most
+            # max_workers years are in flight, so peak memory does not grow with
+            # the number of years. Temperature is sent as float32, which resolves
+            # far finer than the data's precision and halves what is pickled to
+            # the workers and swept when the source is float64.
             results = {}
+            georef = None
             max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_year = {
-                    executor.submit(self._calculate_tr20_for_year, year, dataset): year
-                    for year, dataset in datasets.items()
-                }
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = {}
+                for year, dataset in downloader.iter_years():
+                    temp_values = dataset['2m_Minimum_Temperature'].values.astype(np.float32, copy=False)
+                    pending[executor.submit(_calculate_tr20_for_year, year, temp_values)] = year
+                    # All years share one grid, so the first year's coordinates and
+                    # attributes are all that is kept for georeferencing the output
+                    if georef is None:
+                        georef = dataset.drop_vars('2m_Minimum_Temperature')
+                    del dataset, temp_values
+                    
+                    if len(pending) >= max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._collect_tr20_future(future, pending.pop(future), results)
                 
-                for future in as_completed(future_to_year):
-                    year = future_to_year[future]
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            results[year] = result
-                            info("TR20 calculated for year",
-                                 component="tr20_calculator",
-                                 year=year)
-                    except Exception as e:
-                        error("Failed to calculate TR20 for year",
-                              component="tr20_calculator",
-                              year=year,
-                              error=str(e))
+                if georef is None:
+                    error("No data downloaded",
+                          component="tr20_calculator")
+                    return False
+                
+                for future in as_completed(pending):
+                    self._collect_tr20_future(future, pending[future], results)
             
             # Save results
             if results:
-                success = self._save_tr20_results(results, datasets)
-                
-                # Clean up temporary download directory
-                try:
-                    temp_dir = self.output_path / "temp_downloads"
-                    if temp_dir.exists():
-                        import shutil
-                        shutil.rmtree(temp_dir)
-                        info("Temporary download directory cleaned up",
-                             component="tr20_calculator",
-                             temp_dir=str(temp_dir))
-                except Exception as e:
-                    warning("Failed to clean up temporary directory",
-                            component="tr20_calculator",
-                            temp_dir=str(temp_dir),
-                            error=str(e))
-                
-                return success
+                return self._save_tr20_results(results, georef)
             else:
                 error("No TR20 results calculated",
                       component="tr20_calculator")
@@ -119,23 +117,21 @@ class TR20Calculator(BaseIndicatorCalculator):
                   component="tr20_calculator",
                   indicator_code=self.INDICATOR_CODE,
                   error=str(e))
-            
-            # Clean up temporary download directory even on error
+            return False
+        
+        finally:
+            # Clean up temporary download directory, whatever the outcome
             try:
-                temp_dir = self.output_path / "temp_downloads"
                 if temp_dir.exists():
-                    import shutil
                     shutil.rmtree(temp_dir)
-                    info("Temporary download directory cleaned up after error",
+                    info("Temporary download directory cleaned up",
                          component="tr20_calculator",
                          temp_dir=str(temp_dir))
-            except Exception as cleanup_error:
-                warning("Failed to clean up temporary directory after error",
+            except Exception as e:
+                warning("Failed to clean up temporary directory",
                         component="tr20_calculator",
                         temp_dir=str(temp_dir),
-                        error=str(cleanup_error))
-            
-            return False
+                        error=str(e))
 
     def _get_geoserver_config(self) -> dict:
         """Get GeoServer configuration for temperature data"""
@@ -157,68 +153,35 @@ class TR20Calculator(BaseIndicatorCalculator):
                   error=str(e))
             return {}
 
-    def _calculate_tr20_for_year(self, year: int, dataset: xr.Dataset) -> Optional[np.ndarray]:
+    def _collect_tr20_future(self, future: Future, year: int, results: dict):
         """
-        Calculate TR20 values for a specific year using xarray Dataset.
+        Store the result of a finished TR20 computation.
         
         Args:
-            year: Year to calculate TR20 for
-            dataset: xarray Dataset with daily minimum temperature data
-            
-        Returns:
-            numpy array with TR20 values, or None if calculation fails
+            future: Completed future returned by _calculate_tr20_for_year
+            year: Year the future was computed for
+            results: Dictionary of results per year, updated in place
         """
         try:
-            info("Calculating TR20 for year",
-                 component="tr20_calculator",
-                 year=year,
-                 dataset_shape=dataset['2m_Minimum_Temperature'].shape)
-            
-            # Get temperature data
-            temp_data = dataset['2m_Minimum_Temperature']
-            
-            # Convert temperature to Celsius if needed (assuming data is in Kelvin)
-            # Check if temperature values are in Kelvin range (typically > 200)
-            temp_values = temp_data.values
-            if np.nanmean(temp_values) > 200:
-                temp_values = temp_values - 273.15  # Convert from Kelvin to Celsius
-                info("Converted temperature from Kelvin to Celsius",
+            result = future.result()
+            if result is not None:
+                results[year] = result
+                info("TR20 calculated for year",
                      component="tr20_calculator",
                      year=year)
-            
-            # Count days where minimum temperature > 20°C for each pixel
-            hot_days_mask = temp_values > 20.0
-            
-            # Count days per pixel (sum along time axis)
-            tr20_values = np.sum(hot_days_mask, axis=0)
-            
-            # Handle NaN values - set to NaN where all values were NaN
-            all_nan_mask = np.all(np.isnan(temp_data), axis=0)
-            tr20_values = tr20_values.astype(float)
-            tr20_values[all_nan_mask] = np.nan
-            
-            info("TR20 calculation completed for year",
-                 component="tr20_calculator",
-                 year=year,
-                 max_tr20=np.nanmax(tr20_values),
-                 min_tr20=np.nanmin(tr20_values),
-                 mean_tr20=np.nanmean(tr20_values))
-            
-            return tr20_values
-            
         except Exception as e:
             error("Failed to calculate TR20 for year",
                   component="tr20_calculator",
                   year=year,
                   error=str(e))
-            return None
 
-    def _save_tr20_results(self, results: dict, datasets: dict) -> bool:
+    def _save_tr20_results(self, results: dict, georef: xr.Dataset) -> bool:
         """
         Save TR20 calculation results to GeoTIFF files.
         
         Args:
             results: Dictionary mapping years to TR20 arrays
+            georef: xarray Dataset with the coordinates and attributes of the grid
             
         Returns:
             bool: True if saving was successful
@@ -228,25 +191,29 @@ class TR20Calculator(BaseIndicatorCalculator):
                  component="tr20_calculator",
                  year_count=len(results))
             
-            # Get reference file for spatial metadata
-            sample_year = list(results.keys())[0]
-            sample_data = results[sample_year]
+            # Every year comes from the same GeoServer layer, so the grid is the
+            # same: compute the transform and CRS once for all years
+            height, width = next(iter(results.values())).shape
             
-            # For each year, save as GeoTIFF
-            for year, tr20_data in results.items():
-                output_filename = self._generate_climate_index_filename(year)
-                output_path = self.output_path / output_filename
-                
-                # Save as GeoTIFF using spatial info from dataset
-                dataset = datasets[year]
-                self._save_as_geotiff(tr20_data, output_path, year, dataset)
-                
-                info("TR20 result saved",
-                     component="tr20_calculator",
-                     year=year,
-                     output_file=str(output_path))
+            lons = georef.lon.values
+            lats = georef.lat.values
             
-            return True
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
+            
+            # Get CRS from dataset attributes or use default
+            crs = georef.attrs.get('crs', 'EPSG:4326')
+            
+            # Save each year as GeoTIFF concurrently; GDAL releases the GIL while
+            # compressing and writing, so the years' writes overlap
+            with ThreadPoolExecutor(max_workers=4) as io_executor:
+                save_futures = [
+                    io_executor.submit(self._save_tr20_year, year, tr20_data, transform, crs)
+                    for year, tr20_data in results.items()
+                ]
+                saved_flags = [future.result() for future in save_futures]
+            
+            return all(saved_flags)
             
         except Exception as e:
             error("Failed to save TR20 results",
@@ -254,34 +221,61 @@ class TR20Calculator(BaseIndicatorCalculator):
                   error=str(e))
             return False
 
-    def _save_as_geotiff(self, data: np.ndarray, output_path: Path, year: int, dataset: xr.Dataset):
+    def _save_tr20_year(self, year: int, tr20_data: np.ndarray, transform: rasterio.Affine, crs: str) -> bool:
         """
-        Save data as GeoTIFF with proper georeferencing from dataset.
+        Save one year's TR20 result to a GeoTIFF file.
         
         Args:
-            data: 2D numpy array with TR20 values
-            output_path: Output file path
-            year: Year for metadata
-            dataset: xarray Dataset for spatial information
+            year: Year of the result
+            tr20_data: 2D int16 array with TR20 values
+            transform: Affine transform of the output grid
+            crs: CRS of the output grid
+            
+        Returns:
+            bool: True if saving was successful
         """
         try:
-            height, width = data.shape
+            output_filename = self._generate_climate_index_filename(year)
+            output_path = self.output_path / output_filename
+            
+            if not self._save_as_geotiff(tr20_data, output_path, year, transform, crs):
+                error("Failed to save TR20 result",
+                      component="tr20_calculator",
+                      year=year,
+                      output_file=str(output_path))
+                return False
             
-            # Get spatial information from dataset
-            lons = dataset.lon.values
-            lats = dataset.lat.values
+            info("TR20 result saved",
+                 component="tr20_calculator",
+                 year=year,
+                 output_file=str(output_path))
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
+            return True
             
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+        except Exception as e:
+            error("Failed to save TR20 result",
+                  component="tr20_calculator",
+                  year=year,
+                  error=str(e))
+            return False
+
+    def _save_as_geotiff(self, data: np.ndarray, output_path: Path, year: int,
+                         transform: rasterio.Affine, crs: str) -> bool:
+        """
+        Save data as GeoTIFF with the given georeferencing.
+        
+        Args:
+            data: 2D int16 array with TR20 values
+            output_path: Output file path
+            year: Year for metadata
+            transform: Affine transform of the output grid
+            crs: CRS of the output grid
             
-            # Get CRS from dataset attributes or use default
-            crs = dataset.attrs.get('crs', 'EPSG:4326')
+        Returns:
+            bool: True once the file is written; failures are raised
+        """
+        try:
+            height, width = data.shape
             
             with rasterio.open(
                 output_path,
@@ -290,11 +284,17 @@ class TR20Calculator(BaseIndicatorCalculator):
                 height=height,
                 width=width,
                 count=1,
-                dtype=data.dtype,
+                dtype='int16',
                 crs=crs,
                 transform=transform,
+                # Tiled LZW with horizontal differencing, which suits integer
+                # day counts and lets readers fetch single tiles
+                tiled=True,
+                blockxsize=256,
+                blockysize=256,
                 compress='lzw',
-                nodata=np.nan
+                predictor=2,
+                nodata=TR20_NODATA
             ) as dst:
                 dst.write(data, 1)
                 
@@ -312,6 +312,8 @@ class TR20Calculator(BaseIndicatorCalculator):
                  output_path=str(output_path),
                  year=year,
                  shape=data.shape)
+            
+            return True
                 
         except Exception as e:
             error("Failed to save TR20 data as GeoTIFF",
@@ -386,6 +388,107 @@ class TR20Calculator(BaseIndicatorCalculator):
         return False
 
 
+def _calculate_tr20_for_year(year: int, temp_values: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Calculate TR20 values for a specific year.
+    
+    Defined at module level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        year: Year to calculate TR20 for
+        temp_values: 3D array (time, lat, lon) with daily minimum temperature
+        
+    Returns:
+        2D int16 array with TR20 values (TR20_NODATA where every day is NaN),
+        or None if calculation fails
+    """
+    try:
+        info("Calculating TR20 for year",
+             component="tr20_calculator",
+             year=year,
+             dataset_shape=temp_values.shape)
+        
+        # Compare against 20°C in the data's own units (assuming Kelvin if
+        # values are typically > 200) so the cube is never converted
+        threshold = TR20_THRESHOLD_CELSIUS
+        if is_kelvin(temp_values):
+            threshold += KELVIN_OFFSET
+            info("Temperature data in Kelvin, using threshold in Kelvin",
+                 component="tr20_calculator",
+                 year=year)
+        
+        # Count days where minimum temperature > 20°C for each pixel
+        warm_night_count, all_nan_mask = _count_days_above(temp_values, threshold)
+        
+        # Handle NaN values - set to nodata where all values were NaN
+        tr20_values = warm_night_count
+        tr20_values[all_nan_mask] = TR20_NODATA
+        
+        info("TR20 calculation completed for year",
+             component="tr20_calculator",
+             year=year)
+        
+        # Summary statistics cost extra passes over the grid, so they are only
+        # computed when debug logging is enabled
+        if logging_manager.logger.isEnabledFor(logging.DEBUG):
+            valid_counts = tr20_values[~all_nan_mask]
+            if valid_counts.size:
+                debug("TR20 statistics for year",
+                      component="tr20_calculator",
+                      year=year,
+                      max_tr20=int(valid_counts.max()),
+                      min_tr20=int(valid_counts.min()),
+                      mean_tr20=float(valid_counts.mean()))
+        
+        return tr20_values
+        
+    except Exception as e:
+        error("Failed to calculate TR20 for year",
+              component="tr20_calculator",
+              year=year,
+              error=str(e))
+        return None
+
+
+def _count_days_above(temp_values: np.ndarray, threshold: float):
+    """
+    Count the days above a threshold for each pixel.
+    
+    Args:
+        temp_values: 3D array (time, lat, lon) with daily temperature
+        threshold: Threshold in the same units as temp_values
+        
+    Returns:
+        Tuple of the 2D day count and the 2D mask of pixels where every day is NaN
+    """
+    _, height, width = temp_values.shape
+    day_count = np.zeros((height, width), dtype=np.int16)
+    all_nan = np.ones((height, width), dtype=bool)
+    
+    # Fuse the threshold test, count and NaN tracking into one pass over the
+    # cube, one day at a time, so no cube-sized mask is ever allocated. NaN
+    # compares False, so missing days are never counted. Days are swept over
+    # one band of rows at a time so the band's accumulators stay in cache.
+    # Threshold in the data's dtype, so float32 days are compared in float32
+    threshold = temp_values.dtype.type(threshold)
+    block_rows = max(1, SWEEP_BLOCK_PIXELS // max(width, 1))
+    above_day = np.empty((min(block_rows, height), width), dtype=bool)
+    nan_day = np.empty_like(above_day)
+    for row_start in range(0, height, block_rows):
+        rows = slice(row_start, row_start + block_rows)
+        count_block = day_count[rows]
+        all_nan_block = all_nan[rows]
+        above_block = above_day[:count_block.shape[0]]
+        nan_block = nan_day[:count_block.shape[0]]
+        for day_temp in temp_values[:, rows]:
+            np.greater(day_temp, threshold, out=above_block)
+            np.add(count_block, above_block, out=count_block)
+            np.isnan(day_temp, out=nan_block)
+            np.logical_and(all_nan_block, nan_block, out=all_nan_block)
+    
+    return day_count, all_nan
+
+
 # Additional methods that could be added for a complete TR20 implementation:
 
 class TR20DataProcessor:
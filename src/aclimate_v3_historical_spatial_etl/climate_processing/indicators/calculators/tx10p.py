@@ -8,6 +8,7 @@ from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from ..percentile_calculator import TemperaturePercentileCalculator
 from ..data_downloader import IndicatorDataDownloader
+from ..processing_utils import grid_transform
 from ....tools import info, error, warning
 
 
@@ -314,14 +315,8 @@ class TX10pCalculator(TemperaturePercentileCalculator):
             lons = dataset.lon.values
             lats = dataset.lat.values
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
-            
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
             
             # Get CRS from dataset attributes or use default
             crs = dataset.attrs.get('crs', 'EPSG:4326')
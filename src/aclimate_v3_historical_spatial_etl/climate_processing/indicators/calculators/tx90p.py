@@ -1,14 +1,16 @@
 import os
+import logging
 import xarray as xr
 import numpy as np
 import rasterio
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from ..percentile_calculator import TemperaturePercentileCalculator
 from ..data_downloader import IndicatorDataDownloader
-from ....tools import info, error, warning
+from ..processing_utils import SWEEP_BLOCK_PIXELS, KELVIN_OFFSET, grid_transform, is_kelvin
+from ....tools import info, error, warning, debug, logging_manager
 
 
 class TX90pCalculator(TemperaturePercentileCalculator):
@@ -70,29 +72,30 @@ class TX90pCalculator(TemperaturePercentileCalculator):
                       component="tx90p_calculator")
                 return False
             
-            # Calculate TX90p for each year in parallel
+            # Calculate TX90p for each year in parallel. The count is CPU-bound, so
+            # it runs in worker processes; a memory-mapped percentile is sent as
+            # its .npy path so workers map the same file instead of receiving a copy.
+            # Temperature is sent as float32, which resolves far finer than the
+            # data's precision and halves what is pickled to the workers when the
+            # source is float64. At most max_workers years are in flight, so only
+            # that many float32 copies are held at once.
+            percentile_source = percentile_90.filename if isinstance(percentile_90, np.memmap) else percentile_90
             results = {}
             max_workers = int(os.getenv('MAX_PARALLEL_DOWNLOADS', 4))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_year = {
-                    executor.submit(self._calculate_tx90p_for_year, year, dataset, percentile_90): year
-                    for year, dataset in datasets.items()
-                }
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = {}
+                for year, dataset in datasets.items():
+                    temp_values = dataset['2m_Maximum_Temperature'].values.astype(np.float32, copy=False)
+                    pending[executor.submit(_calculate_tx90p_for_year, year, temp_values, percentile_source)] = year
+                    del temp_values
+                    
+                    if len(pending) >= max_workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._collect_tx90p_future(future, pending.pop(future), results)
                 
-                for future in as_completed(future_to_year):
-                    year = future_to_year[future]
-                    try:
-                        result = future.result()
-                        if result is not None:
-                            results[year] = result
-                            info("TX90p calculated for year",
-                                 component="tx90p_calculator",
-                                 year=year)
-                    except Exception as e:
-                        error("Failed to calculate TX90p for year",
-                              component="tx90p_calculator",
-                              year=year,
-                              error=str(e))
+                for future in as_completed(pending):
+                    self._collect_tx90p_future(future, pending[future], results)
             
             # Save results
             if results:
@@ -161,103 +164,27 @@ class TX90pCalculator(TemperaturePercentileCalculator):
                   error=str(e))
             return {}
 
-
-
-    def _calculate_tx90p_for_year(self, year: int, dataset: xr.Dataset, percentile_90: np.ndarray) -> Optional[np.ndarray]:
+    def _collect_tx90p_future(self, future: Future, year: int, results: dict):
         """
-        Calculate TX90p values for a specific year using the base period percentile.
+        Store the result of a finished TX90p computation.
         
         Args:
-            year: Year to calculate TX90p for
-            dataset: xarray Dataset with daily temperature data
-            percentile_90: 2D array with 90th percentile values for each pixel
-            
-        Returns:
-            numpy array with TX90p percentage values, or None if calculation fails
+            future: Completed future returned by _calculate_tx90p_for_year
+            year: Year the future was computed for
+            results: Dictionary of results per year, updated in place
         """
         try:
-            info("Calculating TX90p for year",
-                 component="tx90p_calculator",
-                 year=year,
-                 dataset_shape=dataset['2m_Maximum_Temperature'].shape)
-            
-            # Get temperature data
-            temp_data = dataset['2m_Maximum_Temperature']
-            temp_values = temp_data.values
-            
-            # Convert temperature to Celsius if needed
-            if np.nanmean(temp_values) > 200:
-                temp_values = temp_values - 273.15
-                info("Converted temperature from Kelvin to Celsius",
+            result = future.result()
+            if result is not None:
+                results[year] = result
+                info("TX90p calculated for year",
                      component="tx90p_calculator",
                      year=year)
-            
-            # Calculate TX90p for each pixel
-            tx90p_values = self._calculate_warm_days_percentage(temp_values, percentile_90)
-            
-            # Handle cases where all values were NaN
-            all_nan_mask = np.all(np.isnan(temp_values), axis=0)
-            tx90p_values[all_nan_mask] = np.nan
-            
-            info("TX90p calculation completed for year",
-                 component="tx90p_calculator",
-                 year=year,
-                 max_tx90p=np.nanmax(tx90p_values),
-                 min_tx90p=np.nanmin(tx90p_values),
-                 mean_tx90p=np.nanmean(tx90p_values))
-            
-            return tx90p_values
-            
         except Exception as e:
             error("Failed to calculate TX90p for year",
                   component="tx90p_calculator",
                   year=year,
                   error=str(e))
-            return None
-
-    def _calculate_warm_days_percentage(self, temp_values: np.ndarray, percentile_90: np.ndarray) -> np.ndarray:
-        """
-        Calculate percentage of days with temperature above 90th percentile for each pixel.
-        
-        Args:
-            temp_values: 3D array (time, lat, lon) with temperature values
-            percentile_90: 2D array (lat, lon) with 90th percentile values
-            
-        Returns:
-            2D array (lat, lon) with percentage values
-        """
-        time_steps, height, width = temp_values.shape
-        tx90p_result = np.zeros((height, width), dtype=np.float32)
-        
-        # Process each pixel
-        for i in range(height):
-            for j in range(width):
-                pixel_temp = temp_values[:, i, j]
-                pixel_percentile = percentile_90[i, j]
-                
-                # Skip if percentile is NaN or all values are NaN
-                if np.isnan(pixel_percentile) or np.all(np.isnan(pixel_temp)):
-                    tx90p_result[i, j] = np.nan
-                    continue
-                
-                # Count valid temperature values
-                valid_temp = pixel_temp[~np.isnan(pixel_temp)]
-                
-                if len(valid_temp) == 0:
-                    tx90p_result[i, j] = np.nan
-                    continue
-                
-                # Count days above 90th percentile
-                warm_days = np.sum(valid_temp > pixel_percentile)
-                total_days = len(valid_temp)
-                
-                # Calculate percentage
-                if total_days > 0:
-                    tx90p_result[i, j] = (warm_days / total_days) * 100.0
-                else:
-                    tx90p_result[i, j] = np.nan
-        
-        return tx90p_result
 
     def _save_tx90p_results(self, results: dict, datasets: dict) -> bool:
         """
@@ -314,14 +241,8 @@ class TX90pCalculator(TemperaturePercentileCalculator):
             lons = dataset.lon.values
             lats = dataset.lat.values
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
-            
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
             
             # Get CRS from dataset attributes or use default
             crs = dataset.attrs.get('crs', 'EPSG:4326')
@@ -377,6 +298,116 @@ class TX90pCalculator(TemperaturePercentileCalculator):
         return False
 
 
+def _calculate_tx90p_for_year(year: int, temp_values: np.ndarray,
+                              percentile_90: Union[np.ndarray, str, Path]) -> Optional[np.ndarray]:
+    """
+    Calculate TX90p values for a specific year using the base period percentile.
+    
+    Defined at module level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        year: Year to calculate TX90p for
+        temp_values: 3D array (time, lat, lon) with daily maximum temperature
+        percentile_90: 2D array with 90th percentile values for each pixel, or
+            the path of a .npy file holding it (loaded memory-mapped)
+        
+    Returns:
+        numpy array with TX90p percentage values, or None if calculation fails
+    """
+    try:
+        info("Calculating TX90p for year",
+             component="tx90p_calculator",
+             year=year,
+             dataset_shape=temp_values.shape)
+        
+        if isinstance(percentile_90, (str, Path)):
+            percentile_90 = np.load(percentile_90, mmap_mode='r')
+        
+        # Percentiles are in Celsius; for Kelvin data (values typically > 200)
+        # shift the threshold instead of converting the whole cube
+        threshold = percentile_90
+        if is_kelvin(temp_values):
+            threshold = percentile_90 + KELVIN_OFFSET
+            info("Temperature data in Kelvin, using threshold in Kelvin",
+                 component="tx90p_calculator",
+                 year=year)
+        
+        # Calculate TX90p for each pixel (pixels where all values are NaN
+        # are set to NaN by the sweep)
+        tx90p_values = _calculate_warm_days_percentage(temp_values, threshold)
+        
+        info("TX90p calculation completed for year",
+             component="tx90p_calculator",
+             year=year)
+        
+        # Summary statistics cost three extra passes over the grid, so they
+        # are only computed when debug logging is enabled
+        if logging_manager.logger.isEnabledFor(logging.DEBUG):
+            debug("TX90p statistics for year",
+                  component="tx90p_calculator",
+                  year=year,
+                  max_tx90p=np.nanmax(tx90p_values),
+                  min_tx90p=np.nanmin(tx90p_values),
+                  mean_tx90p=np.nanmean(tx90p_values))
+        
+        return tx90p_values
+        
+    except Exception as e:
+        error("Failed to calculate TX90p for year",
+              component="tx90p_calculator",
+              year=year,
+              error=str(e))
+        return None
+
+
+def _calculate_warm_days_percentage(temp_values: np.ndarray, percentile_90: np.ndarray) -> np.ndarray:
+    """
+    Calculate percentage of days with temperature above 90th percentile for each pixel.
+    
+    Args:
+        temp_values: 3D array (time, lat, lon) with temperature values
+        percentile_90: 2D array (lat, lon) with 90th percentile values, in
+            the same units as temp_values
+        
+    Returns:
+        2D array (lat, lon) with percentage values
+    """
+    _, height, width = temp_values.shape
+    warm_days = np.zeros((height, width), dtype=np.int16)
+    valid_days = np.full((height, width), temp_values.shape[0], dtype=np.int16)
+    
+    # Sweep the days over one band of rows at a time so the band's counters,
+    # percentiles and masks stay in cache for the whole year instead of being
+    # streamed from memory once per day. NaN days compare False, so they are
+    # never counted as warm, and are taken off the pixel's valid day count.
+    block_rows = max(1, SWEEP_BLOCK_PIXELS // max(width, 1))
+    warm_day = np.empty((min(block_rows, height), width), dtype=bool)
+    nan_day = np.empty_like(warm_day)
+    for row_start in range(0, height, block_rows):
+        rows = slice(row_start, row_start + block_rows)
+        warm_block = warm_days[rows]
+        valid_block = valid_days[rows]
+        percentile_block = percentile_90[rows]
+        warm_day_block = warm_day[:warm_block.shape[0]]
+        nan_block = nan_day[:warm_block.shape[0]]
+        for day_temp in temp_values[:, rows]:
+            np.greater(day_temp, percentile_block, out=warm_day_block)
+            np.add(warm_block, warm_day_block, out=warm_block)
+            np.isnan(day_temp, out=nan_block)
+            np.subtract(valid_block, nan_block, out=valid_block)
+    
+    # Percentage of valid days above the percentile; pixels without valid
+    # days stay NaN
+    tx90p_result = np.full((height, width), np.nan, dtype=np.float32)
+    np.divide(warm_days, valid_days, out=tx90p_result, where=valid_days > 0)
+    tx90p_result *= np.float32(100.0)
+    
+    # Pixels without a base period percentile have no defined threshold
+    tx90p_result[np.isnan(percentile_90)] = np.nan
+    
+    return tx90p_result
+
+
 class TX90pDataProcessor:
     """
     Helper class for TX90p data processing operations.
@@ -8,6 +8,7 @@ from typing import Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from ..base_calculator import BaseIndicatorCalculator
 from ..data_downloader import IndicatorDataDownloader
+from ..processing_utils import grid_transform
 from ....tools import info, error, warning
 
 
@@ -269,14 +270,8 @@ class TXxCalculator(BaseIndicatorCalculator):
             lons = dataset.lon.values
             lats = dataset.lat.values
             
-            # Calculate transform from coordinates
-            lon_min, lon_max = float(lons.min()), float(lons.max())
-            lat_min, lat_max = float(lats.min()), float(lats.max())
-            
-            transform = rasterio.transform.from_bounds(
-                west=lon_min, south=lat_min, east=lon_max, north=lat_max,
-                width=width, height=height
-            )
+            # Calculate transform from the pixel-centre coordinates
+            transform = grid_transform(lons, lats, width, height)
             
             # Get CRS from dataset attributes or use default
             crs = dataset.attrs.get('crs', 'EPSG:4326')
@@ -4,7 +4,7 @@ import numpy as np
 import xarray as xr
 import rasterio
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple, Union
+from typing import Optional, List, Dict, Tuple, Union, Iterator
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlencode
 from rasterio.io import MemoryFile
@@ -180,6 +180,21 @@ class IndicatorDataDownloader:
                   error=str(e))
             return None
 
+    def download_date(self, date: str) -> Optional[np.ndarray]:
+        """
+        Download the raster of a single date without building a Dataset.
+        
+        Args:
+            date: Date in YYYY-MM-DD format
+        
+        Returns:
+            2D array with the raster values, or None if the download failed
+        """
+        result = self._download_single_date(date)
+        if result is None:
+            return None
+        return result[1]
+
     def download_year_data(self, year: int) -> Optional[xr.Dataset]:
         """
         Download all daily data for a specific year and return as xarray Dataset.
@@ -199,46 +214,47 @@ class IndicatorDataDownloader:
             # Generate all dates for the year
             dates = self._generate_date_range(year)
             
-            # Download data in parallel
-            all_arrays = []
-            all_dates = []
+            # Download data in parallel, placing each day straight into a cube
+            # preallocated from the first response, so the year is never held
+            # twice (as a list of daily arrays plus their stacked copy)
+            data_array = None
+            downloaded = np.zeros(len(dates), dtype=bool)
             spatial_info = None
             
             with ThreadPoolExecutor(max_workers=self.parallel_downloads) as executor:
                 # Submit all download tasks
-                future_to_date = {
-                    executor.submit(self._download_single_date, date): date 
-                    for date in dates
+                future_to_index = {
+                    executor.submit(self._download_single_date, date): index
+                    for index, date in enumerate(dates)
                 }
                 
                 # Collect results
-                for future in as_completed(future_to_date):
+                for future in as_completed(future_to_index):
+                    index = future_to_index.pop(future)
                     result = future.result()
+                    del future
                     if result is not None:
-                        date, array, info_dict = result
-                        all_arrays.append(array)
-                        all_dates.append(date)
-                        if spatial_info is None:
+                        _, array, info_dict = result
+                        if data_array is None:
+                            data_array = np.empty((len(dates),) + array.shape, dtype=array.dtype)
                             spatial_info = info_dict
+                        data_array[index] = array
+                        downloaded[index] = True
+                        del result, array
             
-            if not all_arrays:
+            if data_array is None:
                 warning(f"No data downloaded for year {year}",
                        component="indicator_downloader",
                        year=year)
                 return None
             
-            # Sort by date to ensure proper order
-            date_array_pairs = list(zip(all_dates, all_arrays))
-            date_array_pairs.sort(key=lambda x: x[0])
-            
-            sorted_dates = [pair[0] for pair in date_array_pairs]
-            sorted_arrays = [pair[1] for pair in date_array_pairs]
-            
-            # Create xarray Dataset
-            data_array = np.stack(sorted_arrays, axis=0)
+            # Days are already in date order; drop the ones that could not be downloaded
+            if not downloaded.all():
+                data_array = data_array[downloaded]
+            sorted_dates = [date for date, ok in zip(dates, downloaded) if ok]
             
             # Create coordinate arrays
-            height, width = sorted_arrays[0].shape
+            height, width = data_array.shape[1:]
             transform = spatial_info['transform']
             
             # Calculate lat/lon coordinates
@@ -289,6 +305,38 @@ class IndicatorDataDownloader:
                   error=str(e))
             return None
 
+    def iter_years(self) -> Iterator[Tuple[int, xr.Dataset]]:
+        """
+        Download data year by year, yielding each dataset as soon as it is ready.
+        
+        Unlike download_all_years, only one year is held by the generator at a
+        time, so callers can process and release each year before the next one
+        is downloaded.
+        
+        Yields:
+            Tuples of (year, xarray Dataset) for every year with data
+        """
+        start_year = int(self.year_range[0])
+        end_year = int(self.year_range[1])
+        
+        info(f"Starting download for years {start_year}-{end_year}",
+             component="indicator_downloader",
+             start_year=start_year,
+             end_year=end_year,
+             variable=self.variable)
+        
+        for year in range(start_year, end_year + 1):
+            dataset = self.download_year_data(year)
+            if dataset is None:
+                warning(f"No dataset created for year {year}",
+                       component="indicator_downloader",
+                       year=year)
+                continue
+            
+            yield year, dataset
+            # Drop our reference before downloading the next year
+            del dataset
+
     def download_all_years(self) -> Dict[int, xr.Dataset]:
         """
         Download data for all years in the specified range.
@@ -297,29 +345,11 @@ class IndicatorDataDownloader:
             Dictionary mapping year to xarray Dataset
         """
         try:
-            start_year = int(self.year_range[0])
-            end_year = int(self.year_range[1])
-            
-            info(f"Starting download for years {start_year}-{end_year}",
-                 component="indicator_downloader",
-                 start_year=start_year,
-                 end_year=end_year,
-                 variable=self.variable)
-            
-            datasets = {}
-            
-            for year in range(start_year, end_year + 1):
-                dataset = self.download_year_data(year)
-                if dataset is not None:
-                    datasets[year] = dataset
-                else:
-                    warning(f"No dataset created for year {year}",
-                           component="indicator_downloader",
-                           year=year)
+            datasets = dict(self.iter_years())
             
             info(f"Download completed. Got data for {len(datasets)} years",
                  component="indicator_downloader",
-                 requested_years=list(range(start_year, end_year + 1)),
+                 requested_years=list(range(int(self.year_range[0]), int(self.year_range[1]) + 1)),
                  successful_years=list(datasets.keys()))
             
             return datasets
@@ -1,8 +1,10 @@
 import os
+import zlib
+import hashlib
 import xarray as xr
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterator, Tuple
 from datetime import datetime
 from abc import ABC, abstractmethod
 from .base_calculator import BaseIndicatorCalculator
@@ -33,9 +35,24 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
     # Class-level cache for percentiles to avoid recalculation
     _percentile_cache = {}
     
+    # Version of the persisted percentile files; bump it whenever the percentile
+    # calculation changes so files written by older code are not reused
+    PERCENTILE_FILE_VERSION = 1
+    
     # Class-level cache for base period datasets to enable data reuse
     _base_period_data_cache = {}
     
+    # Class-level cache of base period data fingerprints, so the first base day
+    # is downloaded once per variable and run
+    _base_data_fingerprints = {}
+    
+    # Class-level cache for years downloaded outside the base period, so sibling
+    # indicators on the same variable (e.g. TX90p and TX10p) download them once.
+    # Cached cubes stay in memory until evicted, so the cache is opt-in: it keeps
+    # at most INDICATOR_DATA_CACHE_YEARS years per variable (0, the default,
+    # disables it), evicting the oldest first
+    _indicator_data_cache = {}
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._cache_key = None
@@ -127,6 +144,10 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
         """Generate cache key for base period datasets."""
         return f"{self.country_code}_{self.data_variable}_{self.base_period_start}_{self.base_period_end}"
     
+    def _get_indicator_data_cache_key(self) -> str:
+        """Generate cache key for datasets downloaded for indicator years."""
+        return f"{self.country_code}_{self.data_variable}"
+    
     def _group_consecutive_years(self, years: list) -> list:
         """
         Group consecutive years into ranges for efficient downloading.
@@ -154,6 +175,121 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
         ranges.append((start, end))
         return ranges
     
+    def iter_datasets_for_indicator_calculation(self, start_year: str, end_year: str) -> Iterator[Tuple[int, xr.Dataset]]:
+        """
+        Yield datasets for indicator calculation one year at a time, reusing base
+        period data when possible.
+        
+        Years available from the base period cache or already downloaded by another
+        indicator are yielded first; the remaining years are then downloaded and
+        yielded as each one arrives, so callers can start computing while later
+        years are still downloading. Years that fail to download are skipped, so
+        callers should compare what they receive with the requested range.
+        
+        Args:
+            start_year: Start year for indicator calculation
+            end_year: End year for indicator calculation
+            
+        Yields:
+            Tuples of (year, xarray Dataset)
+        """
+        start_year_int = int(start_year)
+        end_year_int = int(end_year)
+        base_start = int(self.base_period_start)
+        base_end = int(self.base_period_end)
+        
+        info(f"Getting datasets for {self.INDICATOR_CODE} calculation",
+             component=f"{self.INDICATOR_CODE.lower()}_calculator",
+             indicator_period=f"{start_year}-{end_year}",
+             base_period=f"{self.base_period_start}-{self.base_period_end}",
+             data_type=self.data_type)
+        
+        # Check if we already have base period data cached
+        base_cache_key = self._get_base_data_cache_key()
+        base_period_data = self._base_period_data_cache.get(base_cache_key)
+        
+        # Determine which years we need to download
+        all_needed_years = set(range(start_year_int, end_year_int + 1))
+        available_from_base = set()
+        
+        if base_period_data:
+            # We have base period data, check overlap. The cache may hold only
+            # part of the base period, so use the years it actually contains
+            available_from_base = all_needed_years.intersection(base_period_data)
+            info(f"Found {len(available_from_base)} years available from base period cache",
+                 component=f"{self.INDICATOR_CODE.lower()}_calculator",
+                 available_years=sorted(available_from_base))
+        
+        # Years we still need, first looking at years other indicators downloaded
+        years_to_download = all_needed_years - available_from_base
+        indicator_data = self._indicator_data_cache.setdefault(self._get_indicator_data_cache_key(), {})
+        available_from_indicators = years_to_download.intersection(indicator_data)
+        years_to_download -= available_from_indicators
+        
+        # Start with data from base period cache if available
+        for year in sorted(available_from_base):
+            info(f"Reusing base period data for year {year}",
+                 component=f"{self.INDICATOR_CODE.lower()}_calculator")
+            yield year, base_period_data[year]
+        
+        for year in sorted(available_from_indicators):
+            info(f"Reusing indicator data for year {year}",
+                 component=f"{self.INDICATOR_CODE.lower()}_calculator")
+            yield year, indicator_data[year]
+        
+        # Download additional years if needed
+        if years_to_download:
+            info(f"Downloading {len(years_to_download)} additional years",
+                 component=f"{self.INDICATOR_CODE.lower()}_calculator",
+                 years_to_download=sorted(years_to_download))
+            
+            # Group consecutive years for efficient downloading
+            year_ranges = self._group_consecutive_years(sorted(years_to_download))
+            
+            geoserver_config = self._get_geoserver_config()
+            for range_start, range_end in year_ranges:
+                downloader = IndicatorDataDownloader(
+                    geoserver_workspace=geoserver_config['workspace'],
+                    geoserver_layer=geoserver_config['layer'],
+                    output_path=self.output_path / "temp_indicator_downloads",
+                    variable=self.data_variable,
+                    year_range=(range_start, range_end),
+                    parallel_downloads=4
+                )
+                
+                downloaded_count = 0
+                for year, dataset in downloader.iter_years():
+                    downloaded_count += 1
+                    if base_start <= year <= base_end:
+                        # When percentiles were loaded from disk the base period
+                        # was never downloaded, so keep base years here for the
+                        # other indicators, as a fresh calculation would have
+                        self._base_period_data_cache.setdefault(base_cache_key, {})[year] = dataset
+                    else:
+                        self._cache_indicator_year(indicator_data, year, dataset)
+                    yield year, dataset
+                
+                if downloaded_count == 0:
+                    error(f"Failed to download years {range_start}-{range_end}",
+                          component=f"{self.INDICATOR_CODE.lower()}_calculator")
+
+    def _cache_indicator_year(self, indicator_data: Dict[int, xr.Dataset], year: int, dataset: xr.Dataset):
+        """
+        Keep a downloaded year for sibling indicators, within the configured limit.
+        
+        Args:
+            indicator_data: Indicator data cache of this calculator's variable
+            year: Year of the dataset
+            dataset: Downloaded xarray Dataset
+        """
+        max_years = int(os.getenv('INDICATOR_DATA_CACHE_YEARS', 0))
+        if max_years <= 0:
+            return
+        while len(indicator_data) >= max_years:
+            # Dictionaries keep insertion order, so the first key is the oldest year
+            del indicator_data[next(iter(indicator_data))]
+        indicator_data[year] = dataset
+
     def get_datasets_for_indicator_calculation(self, start_year: str, end_year: str) -> Optional[Dict[int, any]]:
         """
         Get datasets for indicator calculation, reusing base period data when possible.
@@ -169,72 +305,8 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
             Dictionary mapping years to datasets, or None if download fails
         """
         try:
-            start_year_int = int(start_year)
-            end_year_int = int(end_year)
-            base_start = int(self.base_period_start)
-            base_end = int(self.base_period_end)
-            
-            info(f"Getting datasets for {self.INDICATOR_CODE} calculation",
-                 component=f"{self.INDICATOR_CODE.lower()}_calculator",
-                 indicator_period=f"{start_year}-{end_year}",
-                 base_period=f"{self.base_period_start}-{self.base_period_end}",
-                 data_type=self.data_type)
-            
-            # Check if we already have base period data cached
-            base_cache_key = self._get_base_data_cache_key()
-            base_period_data = self._base_period_data_cache.get(base_cache_key)
-            
-            # Determine which years we need to download
-            all_needed_years = set(range(start_year_int, end_year_int + 1))
-            available_from_base = set()
-            
-            if base_period_data:
-                # We have base period data, check overlap
-                base_years = set(range(base_start, base_end + 1))
-                available_from_base = all_needed_years.intersection(base_years)
-                info(f"Found {len(available_from_base)} years available from base period cache",
-                     component=f"{self.INDICATOR_CODE.lower()}_calculator",
-                     available_years=sorted(available_from_base))
-            
-            # Years we still need to download
-            years_to_download = all_needed_years - available_from_base
-            
-            # Start with data from base period cache if available
-            all_datasets = {}
-            if available_from_base:
-                for year in available_from_base:
-                    if year in base_period_data:
-                        all_datasets[year] = base_period_data[year]
-                        info(f"Reusing base period data for year {year}",
-                             component=f"{self.INDICATOR_CODE.lower()}_calculator")
-            
-            # Download additional years if needed
-            if years_to_download:
-                info(f"Downloading {len(years_to_download)} additional years",
-                     component=f"{self.INDICATOR_CODE.lower()}_calculator",
-                     years_to_download=sorted(years_to_download))
-                
-                # Group consecutive years for efficient downloading
-                year_ranges = self._group_consecutive_years(sorted(years_to_download))
-                
-                geoserver_config = self._get_geoserver_config()
-                for range_start, range_end in year_ranges:
-                    downloader = IndicatorDataDownloader(
-                        geoserver_workspace=geoserver_config['workspace'],
-                        geoserver_layer=geoserver_config['layer'],
-                        output_path=self.output_path / "temp_indicator_downloads",
-                        variable=self.data_variable,
-                        year_range=(range_start, range_end),
-                        parallel_downloads=4
-                    )
-                    
-                    range_datasets = downloader.download_all_years()
-                    if range_datasets:
-                        all_datasets.update(range_datasets)
-                    else:
-                        error(f"Failed to download years {range_start}-{range_end}",
-                              component=f"{self.INDICATOR_CODE.lower()}_calculator")
-                        return None
+            all_needed_years = set(range(int(start_year), int(end_year) + 1))
+            all_datasets = dict(self.iter_datasets_for_indicator_calculation(start_year, end_year))
             
             if len(all_datasets) != len(all_needed_years):
                 missing_years = all_needed_years - set(all_datasets.keys())
@@ -243,9 +315,7 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
                 return None
             
             info(f"Successfully obtained datasets for all {len(all_datasets)} years",
-                 component=f"{self.INDICATOR_CODE.lower()}_calculator",
-                 reused_count=len(available_from_base),
-                 downloaded_count=len(years_to_download))
+                 component=f"{self.INDICATOR_CODE.lower()}_calculator")
             
             return all_datasets
             
@@ -257,7 +327,8 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
     def get_base_period_percentiles(self) -> Optional[Dict[int, np.ndarray]]:
         """
         Get or calculate base period percentiles for this indicator.
-        Uses caching to avoid recalculation across multiple indicators.
+        Uses caching to avoid recalculation across multiple indicators, and
+        persists the result as .npy files so later runs load it memory-mapped.
         
         Returns:
             Dictionary mapping percentile values to 2D arrays, or None if calculation fails
@@ -271,6 +342,12 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
                  cache_key=cache_key)
             return self._percentile_cache[cache_key]
         
+        # Reuse percentiles persisted by a previous run
+        percentiles_dict = self._load_persisted_percentiles()
+        if percentiles_dict is not None:
+            self._percentile_cache[cache_key] = percentiles_dict
+            return percentiles_dict
+        
         # Calculate percentiles
         info(f"Calculating base period percentiles for {self.INDICATOR_CODE}",
              component=f"{self.INDICATOR_CODE.lower()}_calculator",
@@ -281,6 +358,11 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
         percentiles_dict = self._calculate_base_period_percentiles()
         
         if percentiles_dict is not None:
+            # Persist to disk and switch to the memory-mapped copies so every
+            # year (and any later run) reads the same pages
+            if self._persist_percentiles(percentiles_dict):
+                percentiles_dict = self._load_persisted_percentiles() or percentiles_dict
+            
             # Cache the results
             self._percentile_cache[cache_key] = percentiles_dict
             info(f"Cached percentiles for future use",
@@ -289,6 +371,123 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
         
         return percentiles_dict
     
+    def _get_base_data_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint the base period data by its grid shape and a checksum of its
+        first day, so persisted percentiles are not reused once the data is
+        reprocessed or the grid changes.
+        
+        Returns:
+            Fingerprint string, or None if the first base day could not be downloaded
+        """
+        base_cache_key = self._get_base_data_cache_key()
+        if base_cache_key in self._base_data_fingerprints:
+            return self._base_data_fingerprints[base_cache_key]
+        
+        try:
+            geoserver_config = self._get_geoserver_config()
+            downloader = IndicatorDataDownloader(
+                geoserver_workspace=geoserver_config['workspace'],
+                geoserver_layer=geoserver_config['layer'],
+                output_path=self.output_path / "temp_downloads",
+                variable=self.data_variable,
+                year_range=(int(self.base_period_start), int(self.base_period_start)),
+                parallel_downloads=4
+            )
+            first_day = downloader.download_date(f"{self.base_period_start}-01-01")
+        except Exception as e:
+            warning("Failed to fingerprint base period data",
+                    component=f"{self.INDICATOR_CODE.lower()}_calculator",
+                    error=str(e))
+            return None
+        
+        if first_day is None:
+            return None
+        
+        shape = "x".join(map(str, first_day.shape))
+        checksum = zlib.crc32(np.ascontiguousarray(first_day).tobytes())
+        fingerprint = f"{shape}_{checksum:08x}"
+        self._base_data_fingerprints[base_cache_key] = fingerprint
+        return fingerprint
+    
+    def _get_percentile_file(self, percentile: int) -> Optional[Path]:
+        """
+        Get the on-disk cache path for one base period percentile.
+        
+        Files live in <output_path>/base_period_percentiles. The name carries the
+        base period years, the file version and a short hash of the data source
+        (GeoServer URL, workspace and layer) and of the base data fingerprint, so
+        files computed by older code, for another period or from other data are
+        never reused.
+        
+        Returns:
+            Path of the .npy file, or None if the base data cannot be fingerprinted
+        """
+        fingerprint = self._get_base_data_fingerprint()
+        if fingerprint is None:
+            return None
+        
+        geoserver_config = self._get_geoserver_config()
+        source = "|".join([os.getenv('GEOSERVER_URL', '').rstrip('/'),
+                           geoserver_config.get('workspace', ''),
+                           geoserver_config.get('layer', ''),
+                           fingerprint])
+        source_hash = hashlib.sha1(source.encode()).hexdigest()[:8]
+        filename = (f"p{percentile}_{self.country_code}_{self.data_variable}_"
+                    f"{self.base_period_start}_{self.base_period_end}_"
+                    f"v{self.PERCENTILE_FILE_VERSION}_{source_hash}.npy")
+        return self.output_path / "base_period_percentiles" / filename
+    
+    def _load_persisted_percentiles(self) -> Optional[Dict[int, np.ndarray]]:
+        """
+        Load previously persisted base period percentiles as read-only memory maps.
+        
+        Returns:
+            Dictionary mapping percentile values to 2D arrays, or None if any is missing
+        """
+        percentile_files = {p: self._get_percentile_file(p) for p in self.required_percentiles}
+        if not all(path is not None and path.exists() for path in percentile_files.values()):
+            return None
+        
+        try:
+            percentiles_dict = {
+                percentile: np.load(path, mmap_mode='r')
+                for percentile, path in percentile_files.items()
+            }
+            info(f"Loaded persisted percentiles for {self.INDICATOR_CODE}",
+                 component=f"{self.INDICATOR_CODE.lower()}_calculator",
+                 files=[str(path) for path in percentile_files.values()])
+            return percentiles_dict
+        except Exception as e:
+            warning("Failed to load persisted percentiles, recalculating",
+                    component=f"{self.INDICATOR_CODE.lower()}_calculator",
+                    error=str(e))
+            return None
+    
+    def _persist_percentiles(self, percentiles_dict: Dict[int, np.ndarray]) -> bool:
+        """
+        Save base period percentiles as float32 .npy files for reuse across runs.
+        
+        Args:
+            percentiles_dict: Dictionary mapping percentile values to 2D arrays
+            
+        Returns:
+            bool: True if all percentiles were saved
+        """
+        try:
+            for percentile, values in percentiles_dict.items():
+                path = self._get_percentile_file(percentile)
+                if path is None:
+                    return False
+                path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(path, np.asarray(values, dtype=np.float32))
+            return True
+        except Exception as e:
+            warning("Failed to persist percentiles",
+                    component=f"{self.INDICATOR_CODE.lower()}_calculator",
+                    error=str(e))
+            return False
+    
     def _calculate_base_period_percentiles(self) -> Optional[Dict[int, np.ndarray]]:
         """
         Calculate percentiles from the base period data.
@@ -303,18 +502,24 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
                  base_period=f"{self.base_period_start}-{self.base_period_end}",
                  data_variable=self.data_variable)
             
-            geoserver_config = self._get_geoserver_config()
-            downloader = IndicatorDataDownloader(
-                geoserver_workspace=geoserver_config['workspace'],
-                geoserver_layer=geoserver_config['layer'],
-                output_path=self.output_path / "temp_base_period",
-                variable=self.data_variable,
-                year_range=(int(self.base_period_start), int(self.base_period_end)),
-                parallel_downloads=4
-            )
+            # Start from base years another indicator already downloaded and
+            # download only the rest
+            base_cache_key = self._get_base_data_cache_key()
+            base_datasets = dict(self._base_period_data_cache.get(base_cache_key, {}))
+            missing_years = [year for year in range(int(self.base_period_start), int(self.base_period_end) + 1)
+                             if year not in base_datasets]
             
-            # Download all base period data
-            base_datasets = downloader.download_all_years()
+            geoserver_config = self._get_geoserver_config()
+            for range_start, range_end in self._group_consecutive_years(missing_years):
+                downloader = IndicatorDataDownloader(
+                    geoserver_workspace=geoserver_config['workspace'],
+                    geoserver_layer=geoserver_config['layer'],
+                    output_path=self.output_path / "temp_base_period",
+                    variable=self.data_variable,
+                    year_range=(range_start, range_end),
+                    parallel_downloads=4
+                )
+                base_datasets.update(downloader.download_all_years())
             
             if not base_datasets:
                 error("Failed to download base period data",
@@ -322,7 +527,6 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
                 return None
             
             # Cache the base period datasets for reuse in indicator calculations
-            base_cache_key = self._get_base_data_cache_key()
             self._base_period_data_cache[base_cache_key] = base_datasets
             info(f"Cached base period datasets for reuse",
                  component=f"{self.INDICATOR_CODE.lower()}_calculator",
@@ -424,8 +628,33 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
         """Clear the percentile cache. Useful for testing or memory management."""
         cls._percentile_cache.clear()
         cls._base_period_data_cache.clear()
+        cls._indicator_data_cache.clear()
         info("Percentile and base period data caches cleared", component="percentile_cache")
     
+    @classmethod
+    def get_cached_datasets(cls, country_code: str, data_variable: str) -> Dict[int, xr.Dataset]:
+        """
+        Get the daily datasets already downloaded for a country and variable.
+        
+        Lets indicators that are not percentile based (e.g. RX1DAY) reuse years
+        downloaded by the percentile indicators instead of fetching them again.
+        
+        Args:
+            country_code: Country code the data was downloaded for
+            data_variable: Data variable name (e.g. 'Precipitation')
+            
+        Returns:
+            Dictionary mapping year to xarray Dataset, from both the base period
+            and the indicator data caches
+        """
+        datasets = {}
+        base_key_prefix = f"{country_code}_{data_variable}_"
+        for cache_key, base_datasets in cls._base_period_data_cache.items():
+            if cache_key.startswith(base_key_prefix):
+                datasets.update(base_datasets)
+        datasets.update(cls._indicator_data_cache.get(f"{country_code}_{data_variable}", {}))
+        return datasets
+    
     @classmethod
     def get_cache_info(cls) -> dict:
         """Get information about cached percentiles."""
@@ -434,6 +663,7 @@ class PercentileBasedCalculator(BaseIndicatorCalculator, ABC):
             'percentile_cache_size': len(cls._percentile_cache),
             'base_data_cache_keys': list(cls._base_period_data_cache.keys()),
             'base_data_cache_size': len(cls._base_period_data_cache),
+            'indicator_data_cache_keys': list(cls._indicator_data_cache.keys()),
             'memory_usage_mb': sum(
                 sum(arr.nbytes for arr in percentiles_dict.values()) / (1024 * 1024)
                 for percentiles_dict in cls._percentile_cache.values()
@@ -0,0 +1,115 @@
+"""
+Array and georeferencing helpers shared by the indicator calculators.
+"""
+from typing import Tuple
+import numpy as np
+import rasterio
+
+# Pixels per spatial block in the calculators' daily sweeps, sized so a block's
+# accumulators and masks fit in a typical L2 cache
+SWEEP_BLOCK_PIXELS = 65536
+
+# Offset between Celsius and Kelvin
+KELVIN_OFFSET = 273.15
+
+# Stride (in pixels along each axis) of the sample used to detect Kelvin units
+KELVIN_SAMPLE_STRIDE = 32
+
+
+def detect_precipitation_scale(precip_values: np.ndarray) -> float:
+    """
+    Detect the factor converting a year of precipitation to mm/day from its values.
+    
+    Values in m/day have a maximum valid value below 1. The maximum is taken over
+    every pixel of every day, ignoring NaN and values outside 0-1000, so a few
+    dry or no-data pixels cannot decide the units for the whole grid.
+    
+    Args:
+        precip_values: 3D array (time, lat, lon) with daily precipitation
+    
+    Returns:
+        1000.0 if values are in m/day, otherwise 1.0
+    """
+    # fmax skips NaN without copying the cube, and negative values (such as
+    # -9999) cannot raise the maximum, so an unmasked pass is enough unless
+    # some value lies above the valid range
+    max_precip = float(np.fmax.reduce(precip_values, axis=None, initial=-np.inf))
+    if max_precip <= 1000:
+        return 1000.0 if 0 < max_precip < 1 else 1.0
+    
+    # Otherwise mask out-of-range values one day at a time, allocating only two
+    # day-sized masks
+    max_precip = -np.inf
+    valid_day = np.empty(precip_values.shape[1:], dtype=bool)
+    in_range = np.empty_like(valid_day)
+    for day_precip in precip_values:
+        # NaN compares False, so it is excluded along with out-of-range values
+        np.greater_equal(day_precip, 0, out=valid_day)
+        np.less_equal(day_precip, 1000, out=in_range)
+        np.logical_and(valid_day, in_range, out=valid_day)
+        max_precip = max(max_precip, float(np.fmax.reduce(day_precip, axis=None, where=valid_day,
+                                                          initial=-np.inf)))
+    return 1000.0 if 0 < max_precip < 1 else 1.0
+
+
+def is_kelvin(temp_values: np.ndarray) -> bool:
+    """
+    Tell whether a year of temperature data is in Kelvin.
+    
+    The mean is taken over a strided sample of pixels, which is enough to tell
+    Kelvin from Celsius. If the sample has no valid data (e.g. it only hits
+    sea or no-data pixels) the mean is taken over the whole cube instead, one
+    day at a time.
+    
+    Args:
+        temp_values: 3D array (time, lat, lon) with daily temperature
+    
+    Returns:
+        True if the mean valid temperature is above 200, False if there is no
+        valid data at all
+    """
+    total, count = _valid_sum_count(temp_values[:, ::KELVIN_SAMPLE_STRIDE, ::KELVIN_SAMPLE_STRIDE])
+    if not count:
+        for day_temp in temp_values:
+            day_total, day_count = _valid_sum_count(day_temp)
+            total += day_total
+            count += day_count
+    return count > 0 and total / count > 200
+
+
+def _valid_sum_count(values: np.ndarray) -> Tuple[float, int]:
+    """Sum and count the non-NaN values of an array."""
+    valid = ~np.isnan(values)
+    return float(np.sum(values, where=valid, dtype=np.float64)), int(np.count_nonzero(valid))
+
+
+def grid_transform(lons: np.ndarray, lats: np.ndarray, width: int, height: int) -> rasterio.Affine:
+    """
+    Build the affine transform of a regular grid from its coordinates.
+    
+    The downloaded coordinates are pixel centres, so the origin lies half a
+    pixel out from the first one. Grids with a single row or column have no
+    spacing to measure and fall back to spanning the coordinate bounds.
+    
+    Args:
+        lons: 1D array with the longitude of each column
+        lats: 1D array with the latitude of each row
+        width: Number of columns of the output raster
+        height: Number of rows of the output raster
+    
+    Returns:
+        Affine transform of the output raster
+    """
+    if len(lons) > 1 and len(lats) > 1:
+        dx = float(lons[1] - lons[0])
+        dy = float(lats[0] - lats[1])
+        return rasterio.transform.from_origin(
+            float(lons[0]) - dx / 2, float(lats[0]) + dy / 2, dx, dy
+        )
+    
+    lon_min, lon_max = float(lons.min()), float(lons.max())
+    lat_min, lat_max = float(lats.min()), float(lats.max())
+    return rasterio.transform.from_bounds(
+        west=lon_min, south=lat_min, east=lon_max, north=lat_max,
+        width=width, height=height
+    )
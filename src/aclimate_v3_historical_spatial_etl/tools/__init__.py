@@ -12,5 +12,6 @@ from .logging_manager import (
     info,
     error,
     warning,
+    debug,
     exception
 )
\ No newline at end of file
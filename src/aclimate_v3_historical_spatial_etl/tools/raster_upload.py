@@ -33,6 +33,9 @@ class GeoServerUploadPreparer:
     def prepare_for_upload(self, variable):
         """
         Organizes all TIFF files into the upload directory (copies files).
+        Files are copied unchanged, so rasters stored with a scale factor (such as
+        RX1DAY, in tenths of a millimetre) keep their scaled integer values and
+        their GeoServer styles must apply the scale.
         Works with both structures:
         1. With year subdirectories: variable/year/*.tif
         2. Flat structure: variable/*.tif
@@ -0,0 +1,54 @@
+import os
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pytest
+
+from aclimate_v3_historical_spatial_etl.climate_processing.indicators import IndicatorDataDownloader
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    with patch.dict(os.environ, {"GEOSERVER_URL": "https://example.com/geoserver"}):
+        return IndicatorDataDownloader(
+            geoserver_workspace="climate_historical_daily",
+            geoserver_layer="climate_historical_daily_hn_prec",
+            output_path=tmp_path / "downloads",
+            variable="Precipitation",
+            year_range=(2000, 2003),
+            parallel_downloads=2
+        )
+
+
+class TestIterYears:
+
+    def test_yields_each_downloaded_year_in_order(self, downloader):
+        datasets = {2000: MagicMock(), 2001: MagicMock(), 2003: MagicMock()}
+        with patch.object(downloader, "download_year_data", side_effect=datasets.get) as mock_download:
+            result = list(downloader.iter_years())
+
+        assert result == [(2000, datasets[2000]), (2001, datasets[2001]), (2003, datasets[2003])]
+        assert [call.args[0] for call in mock_download.call_args_list] == [2000, 2001, 2002, 2003]
+
+    def test_downloads_lazily(self, downloader):
+        with patch.object(downloader, "download_year_data", return_value=MagicMock()) as mock_download:
+            years = downloader.iter_years()
+            assert mock_download.call_count == 0
+            next(years)
+            assert mock_download.call_count == 1
+
+    def test_download_all_years_collects_iter_years(self, downloader):
+        datasets = {2000: MagicMock(), 2002: MagicMock()}
+        with patch.object(downloader, "download_year_data", side_effect=datasets.get):
+            assert downloader.download_all_years() == datasets
+
+
+class TestDownloadDate:
+
+    def test_returns_raster(self, downloader):
+        raster = np.ones((2, 3), dtype=np.float32)
+        with patch.object(downloader, "_download_single_date", return_value=("2000-01-01", raster, {})):
+            assert downloader.download_date("2000-01-01") is raster
+
+    def test_failed_download(self, downloader):
+        with patch.object(downloader, "_download_single_date", return_value=None):
+            assert downloader.download_date("2000-01-01") is None
@@ -0,0 +1,298 @@
+import numpy as np
+import pytest
+
+from aclimate_v3_historical_spatial_etl.climate_processing.indicators.calculators import (
+    cdd, r95ptot, rx1day, sdii, tr20, tx90p
+)
+
+# Sweep block small enough to split the test grids into several bands of rows,
+# with a partial last band
+SMALL_BLOCK_PIXELS = 12
+
+DAYS, HEIGHT, WIDTH = 40, 5, 6
+
+
+@pytest.fixture(params=[SMALL_BLOCK_PIXELS, None], ids=["banded", "single-band"])
+def block_pixels(request, monkeypatch):
+    if request.param is not None:
+        for module in (r95ptot, rx1day, sdii, tr20, tx90p):
+            monkeypatch.setattr(module, "SWEEP_BLOCK_PIXELS", request.param)
+    return request.param
+
+
+@pytest.fixture
+def raw_precip():
+    """Daily precipitation in mm with the cases the kernels must handle."""
+    rng = np.random.default_rng(42)
+    precip = rng.gamma(0.6, 8.0, (DAYS, HEIGHT, WIDTH)).astype(np.float32)
+    precip[rng.random(precip.shape) < 0.4] = 0.0
+    precip[rng.random(precip.shape) < 0.1] = 1.0    # on the wet-day threshold
+    precip[rng.random(precip.shape) < 0.1] = 5.0    # on some percentiles
+    precip[rng.random(precip.shape) < 0.05] = np.nan
+    precip[:, 0, 0] = -9999      # CHIRPS no data on every day
+    precip[:, 1, 1] = np.nan     # no data on every day
+    precip[:, 2, 3] = 0.0        # dry year
+    precip[:10, 3, 2] = np.nan   # missing days at the start of a dry spell
+    precip[10:, 3, 2] = 0.0
+    precip[7, 4, 4] = 2500.0     # out of range
+    precip[8, 4, 5] = -5.0       # negative
+    return precip
+
+
+@pytest.fixture
+def raw_celsius():
+    """Daily temperature in Celsius, kept away from the thresholds used below."""
+    rng = np.random.default_rng(7)
+    temp = (np.round(rng.normal(20.0, 4.0, (DAYS, HEIGHT, WIDTH)) * 2) / 2 + 0.25).astype(np.float32)
+    temp[rng.random(temp.shape) < 0.05] = np.nan
+    temp[:, 1, 1] = np.nan
+    return temp
+
+
+def mask_precip(precip):
+    """Masking and unit handling of the original per-year calculation."""
+    precip = precip.copy()
+    precip[(precip < 0) | (precip == -9999) | (precip > 1000)] = np.nan
+    valid_values = precip[~np.isnan(precip)]
+    if len(valid_values) > 0 and np.max(valid_values) < 1 and np.max(valid_values) > 0:
+        precip = precip * 1000
+    return precip
+
+
+def reference_cdd(precip_values):
+    cdd_result = np.zeros(precip_values.shape[1:], dtype=np.float32)
+    for i in range(precip_values.shape[1]):
+        for j in range(precip_values.shape[2]):
+            pixel_precip = precip_values[:, i, j]
+            if np.all(np.isnan(pixel_precip)):
+                cdd_result[i, j] = np.nan
+                continue
+            dry_days = np.where(np.isnan(pixel_precip), False, pixel_precip < 1.0)
+            max_consecutive = current_consecutive = 0
+            for dry in dry_days:
+                current_consecutive = current_consecutive + 1 if dry else 0
+                max_consecutive = max(max_consecutive, current_consecutive)
+            cdd_result[i, j] = max_consecutive
+    return cdd_result
+
+
+def reference_r95ptot(precip_values, percentile_95):
+    r95ptot_result = np.zeros(precip_values.shape[1:], dtype=np.float32)
+    for i in range(precip_values.shape[1]):
+        for j in range(precip_values.shape[2]):
+            pixel_precip = precip_values[:, i, j]
+            pixel_percentile = percentile_95[i, j]
+            if np.isnan(pixel_percentile) or np.all(np.isnan(pixel_precip)):
+                r95ptot_result[i, j] = np.nan
+                continue
+            valid_precip = pixel_precip[~np.isnan(pixel_precip)]
+            # Only wet days (>= 1 mm) count, as in the ETCCDI definition
+            extreme_precip = valid_precip[(valid_precip > pixel_percentile) & (valid_precip >= 1.0)]
+            r95ptot_result[i, j] = np.sum(extreme_precip) if len(extreme_precip) > 0 else 0.0
+    return r95ptot_result
+
+
+def reference_rx1day(precip_values):
+    rx1day_result = np.full(precip_values.shape[1:], np.nan, dtype=np.float32)
+    for i in range(precip_values.shape[1]):
+        for j in range(precip_values.shape[2]):
+            valid_precip = precip_values[:, i, j][~np.isnan(precip_values[:, i, j])]
+            if len(valid_precip) > 0:
+                rx1day_result[i, j] = valid_precip.max()
+    return rx1day_result
+
+
+def reference_sdii(precip_values):
+    sdii_result = np.zeros(precip_values.shape[1:], dtype=np.float32)
+    for i in range(precip_values.shape[1]):
+        for j in range(precip_values.shape[2]):
+            valid_precip = precip_values[:, i, j][~np.isnan(precip_values[:, i, j])]
+            if len(valid_precip) == 0:
+                sdii_result[i, j] = np.nan
+                continue
+            wet_days_precip = valid_precip[valid_precip >= 1.0]
+            if len(wet_days_precip) == 0:
+                sdii_result[i, j] = 0.0
+            else:
+                sdii_result[i, j] = np.sum(wet_days_precip) / len(wet_days_precip)
+    return sdii_result
+
+
+def reference_tr20(temp_values):
+    if np.nanmean(temp_values) > 200:
+        temp_values = temp_values - 273.15
+    tr20_values = np.sum(temp_values > 20.0, axis=0).astype(float)
+    tr20_values[np.all(np.isnan(temp_values), axis=0)] = np.nan
+    return tr20_values
+
+
+def reference_tx90p(temp_values, percentile_90):
+    tx90p_result = np.zeros(temp_values.shape[1:], dtype=np.float32)
+    for i in range(temp_values.shape[1]):
+        for j in range(temp_values.shape[2]):
+            pixel_temp = temp_values[:, i, j]
+            if np.isnan(percentile_90[i, j]) or np.all(np.isnan(pixel_temp)):
+                tx90p_result[i, j] = np.nan
+                continue
+            valid_temp = pixel_temp[~np.isnan(pixel_temp)]
+            tx90p_result[i, j] = np.sum(valid_temp > percentile_90[i, j]) / len(valid_temp) * 100.0
+    return tx90p_result
+
+
+def with_nodata(values, nodata):
+    """Turn an integer result with a nodata sentinel into floats with NaN."""
+    values = values.astype(np.float64)
+    values[values == nodata] = np.nan
+    return values
+
+
+class TestCDDKernel:
+
+    def test_matches_per_pixel_loop(self, raw_precip):
+        precip = raw_precip.copy()
+        invalid_count, _ = cdd._scan_precip(precip)
+        result = cdd._calculate_consecutive_dry_days(precip)
+
+        assert invalid_count == np.count_nonzero((raw_precip < 0) | (raw_precip > 1000))
+        assert result.dtype == np.int16
+        np.testing.assert_array_equal(with_nodata(result, cdd.CDD_NODATA),
+                                      reference_cdd(mask_precip(raw_precip)))
+
+    def test_dry_year_is_one_spell(self, raw_precip):
+        result = cdd._calculate_consecutive_dry_days(mask_precip(raw_precip))
+        assert result[2, 3] == DAYS
+        assert result[3, 2] == DAYS - 10
+        assert result[0, 0] == result[1, 1] == cdd.CDD_NODATA
+
+    def test_year_function_matches_per_pixel_loop(self, raw_precip):
+        result = cdd._calculate_cdd_for_year(2000, mask_precip(raw_precip))
+        np.testing.assert_array_equal(with_nodata(result, cdd.CDD_NODATA),
+                                      reference_cdd(mask_precip(raw_precip)))
+
+
+class TestR95pTOTKernel:
+
+    @pytest.fixture
+    def percentile_95(self, raw_precip):
+        rng = np.random.default_rng(3)
+        percentile = rng.uniform(0.5, 20.0, (HEIGHT, WIDTH)).astype(np.float32)
+        percentile[::2, 1::2] = 5.0
+        percentile[4, 0] = np.nan
+        return percentile
+
+    def test_matches_per_pixel_loop(self, block_pixels, raw_precip, percentile_95):
+        result = r95ptot._calculate_r95ptot_for_year(2000, raw_precip.copy(), percentile_95)
+        np.testing.assert_allclose(result, reference_r95ptot(mask_precip(raw_precip), percentile_95),
+                                   rtol=1e-6, equal_nan=True)
+
+    def test_dry_year_and_missing_pixels(self, raw_precip, percentile_95):
+        result = r95ptot._calculate_r95ptot_for_year(2000, raw_precip.copy(), percentile_95)
+        assert result[2, 3] == 0.0
+        assert np.isnan(result[0, 0]) and np.isnan(result[1, 1]) and np.isnan(result[4, 0])
+
+    def test_precipitation_in_metres(self, raw_precip, percentile_95):
+        precip_m = raw_precip.copy()
+        valid = (precip_m > 0) & (precip_m <= 1000)
+        precip_m[valid] /= 1000
+        result = r95ptot._calculate_r95ptot_for_year(2000, precip_m, percentile_95)
+        np.testing.assert_allclose(result, reference_r95ptot(mask_precip(raw_precip), percentile_95),
+                                   rtol=1e-5, equal_nan=True)
+
+    def test_row_tile_uses_matching_percentile_rows(self, raw_precip, percentile_95):
+        expected = reference_r95ptot(mask_precip(raw_precip), percentile_95)
+        tile = r95ptot._calculate_r95ptot_for_year(2000, raw_precip[:, 2:4].copy(), percentile_95,
+                                                   row_start=2, scale=1.0)
+        np.testing.assert_allclose(tile, expected[2:4], rtol=1e-6, equal_nan=True)
+
+
+class TestRX1DAYKernel:
+
+    def test_matches_per_pixel_maximum(self, block_pixels, raw_precip):
+        result = rx1day._calculate_rx1day_for_year(2000, raw_precip.copy())
+        expected = reference_rx1day(mask_precip(raw_precip))
+
+        assert result.dtype == np.int16
+        stored = with_nodata(result, rx1day.RX1DAY_NODATA) * rx1day.RX1DAY_SCALE_FACTOR
+        np.testing.assert_array_equal(np.isnan(stored), np.isnan(expected))
+        np.testing.assert_allclose(stored, expected, atol=rx1day.RX1DAY_SCALE_FACTOR / 2 + 1e-4,
+                                   equal_nan=True)
+
+    def test_dry_year_is_zero(self, raw_precip):
+        result = rx1day._calculate_rx1day_for_year(2000, raw_precip.copy())
+        assert result[2, 3] == 0
+        assert result[0, 0] == result[1, 1] == rx1day.RX1DAY_NODATA
+
+    def test_precipitation_in_metres(self, raw_precip):
+        precip_m = raw_precip.copy()
+        valid = (precip_m > 0) & (precip_m <= 1000)
+        precip_m[valid] /= 1000
+        np.testing.assert_array_equal(rx1day._calculate_rx1day_for_year(2000, precip_m),
+                                      rx1day._calculate_rx1day_for_year(2000, raw_precip.copy()))
+
+    def test_quantize(self):
+        values = np.array([[0.04, 12.34], [np.nan, 0.0]], dtype=np.float32)
+        np.testing.assert_array_equal(rx1day._quantize_rx1day(values),
+                                      np.array([[0, 123], [rx1day.RX1DAY_NODATA, 0]], dtype=np.int16))
+
+
+class TestSDIIKernel:
+
+    def test_matches_per_pixel_loop(self, block_pixels, raw_precip):
+        result = sdii._calculate_sdii_for_year(2000, raw_precip.copy())
+        np.testing.assert_allclose(result, reference_sdii(mask_precip(raw_precip)),
+                                   rtol=1e-5, equal_nan=True)
+
+    def test_dry_year_and_missing_pixels(self, raw_precip):
+        result = sdii._calculate_sdii_for_year(2000, raw_precip.copy())
+        assert result[2, 3] == 0.0
+        assert np.isnan(result[0, 0]) and np.isnan(result[1, 1])
+
+    def test_precipitation_in_metres(self, raw_precip):
+        precip_m = raw_precip.copy()
+        valid = (precip_m > 0) & (precip_m <= 1000)
+        precip_m[valid] /= 1000
+        np.testing.assert_allclose(sdii._calculate_sdii_for_year(2000, precip_m),
+                                   reference_sdii(mask_precip(raw_precip)),
+                                   rtol=1e-5, equal_nan=True)
+
+
+class TestTR20Kernel:
+
+    @pytest.mark.parametrize("offset", [0.0, 273.15], ids=["celsius", "kelvin"])
+    def test_matches_reference(self, block_pixels, raw_celsius, offset):
+        temp = (raw_celsius + np.float32(offset)).astype(np.float32)
+        result = tr20._calculate_tr20_for_year(2000, temp)
+
+        assert result.dtype == np.int16
+        np.testing.assert_array_equal(with_nodata(result, tr20.TR20_NODATA), reference_tr20(temp))
+
+    def test_count_days_above(self, block_pixels, raw_celsius):
+        temp = raw_celsius.copy()
+        temp[::3, 2:4] = 20.0    # days on the threshold are not counted
+        day_count, all_nan = tr20._count_days_above(temp, 20.0)
+        np.testing.assert_array_equal(day_count, np.sum(temp > 20.0, axis=0))
+        np.testing.assert_array_equal(all_nan, np.all(np.isnan(temp), axis=0))
+
+
+class TestTX90pKernel:
+
+    @pytest.fixture
+    def percentile_90(self):
+        rng = np.random.default_rng(11)
+        percentile = np.round(rng.normal(24.0, 1.0, (HEIGHT, WIDTH))).astype(np.float32)
+        percentile[0, 5] = np.nan
+        return percentile
+
+    @pytest.mark.parametrize("offset", [0.0, 273.15], ids=["celsius", "kelvin"])
+    def test_matches_per_pixel_loop(self, block_pixels, raw_celsius, percentile_90, offset):
+        temp = (raw_celsius + np.float32(offset)).astype(np.float32)
+        result = tx90p._calculate_tx90p_for_year(2000, temp, percentile_90)
+        np.testing.assert_allclose(result, reference_tx90p(raw_celsius, percentile_90),
+                                   rtol=1e-6, equal_nan=True)
+
+    def test_percentiles_from_file(self, tmp_path, raw_celsius, percentile_90):
+        percentile_file = tmp_path / "p90.npy"
+        np.save(percentile_file, percentile_90)
+        result = tx90p._calculate_tx90p_for_year(2000, raw_celsius, percentile_file)
+        np.testing.assert_allclose(result, reference_tx90p(raw_celsius, percentile_90),
+                                   rtol=1e-6, equal_nan=True)
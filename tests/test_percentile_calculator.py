@@ -0,0 +1,128 @@
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pytest
+
+from aclimate_v3_historical_spatial_etl.climate_processing.indicators.percentile_calculator import PercentileBasedCalculator
+from aclimate_v3_historical_spatial_etl.climate_processing.indicators.calculators.tx90p import TX90pCalculator
+
+DOWNLOADER_PATH = "aclimate_v3_historical_spatial_etl.climate_processing.indicators.percentile_calculator.IndicatorDataDownloader"
+
+FIRST_BASE_DAY = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+
+@pytest.fixture(autouse=True)
+def empty_class_caches():
+    with patch.dict(PercentileBasedCalculator._percentile_cache, clear=True), \
+         patch.dict(PercentileBasedCalculator._base_period_data_cache, clear=True), \
+         patch.dict(PercentileBasedCalculator._base_data_fingerprints, clear=True), \
+         patch.dict(PercentileBasedCalculator._indicator_data_cache, clear=True):
+        yield
+
+
+@pytest.fixture
+def mock_downloader():
+    with patch(DOWNLOADER_PATH) as MockDownloader:
+        MockDownloader.return_value.download_date.return_value = FIRST_BASE_DAY
+        yield MockDownloader
+
+
+@pytest.fixture
+def calculator(tmp_path):
+    return TX90pCalculator(
+        {"name": "Warm days", "short_name": "tx90p", "temporality": "annual"},
+        tmp_path, "2000-01", "2002-12", "hn", {}
+    )
+
+
+@pytest.fixture
+def percentiles():
+    return {90: np.linspace(20.0, 31.0, 12, dtype=np.float32).reshape(3, 4)}
+
+
+class TestPersistedPercentiles:
+
+    def test_round_trip(self, calculator, mock_downloader, percentiles):
+        assert calculator._persist_percentiles(percentiles)
+
+        loaded = calculator._load_persisted_percentiles()
+
+        assert isinstance(loaded[90], np.memmap)
+        assert loaded[90].dtype == np.float32
+        np.testing.assert_array_equal(loaded[90], percentiles[90])
+
+    def test_file_location_and_name(self, calculator, mock_downloader):
+        path = calculator._get_percentile_file(90)
+
+        assert path.parent == calculator.output_path / "base_period_percentiles"
+        assert path.name.startswith("p90_hn_2m_Maximum_Temperature_1981_2010_v1_")
+        assert path.suffix == ".npy"
+
+    def test_first_base_day_is_downloaded_once(self, calculator, mock_downloader):
+        calculator._get_percentile_file(90)
+        calculator._get_percentile_file(90)
+
+        mock_downloader.return_value.download_date.assert_called_once_with("1981-01-01")
+
+    def test_changed_base_data_is_not_reused(self, calculator, mock_downloader, percentiles):
+        calculator._persist_percentiles(percentiles)
+
+        # A later run sees reprocessed base data
+        PercentileBasedCalculator._base_data_fingerprints.clear()
+        mock_downloader.return_value.download_date.return_value = FIRST_BASE_DAY + 1
+
+        assert calculator._load_persisted_percentiles() is None
+
+    def test_changed_grid_is_not_reused(self, calculator, mock_downloader, percentiles):
+        calculator._persist_percentiles(percentiles)
+
+        PercentileBasedCalculator._base_data_fingerprints.clear()
+        mock_downloader.return_value.download_date.return_value = FIRST_BASE_DAY.reshape(4, 3)
+
+        assert calculator._load_persisted_percentiles() is None
+
+    def test_unavailable_fingerprint_disables_persistence(self, calculator, mock_downloader, percentiles):
+        mock_downloader.return_value.download_date.return_value = None
+
+        assert not calculator._persist_percentiles(percentiles)
+        assert calculator._load_persisted_percentiles() is None
+        assert not (calculator.output_path / "base_period_percentiles").exists()
+
+    def test_later_run_skips_calculation(self, calculator, mock_downloader, percentiles):
+        calculator._persist_percentiles(percentiles)
+        PercentileBasedCalculator._percentile_cache.clear()
+
+        with patch.object(TX90pCalculator, "_calculate_base_period_percentiles") as mock_calculate:
+            loaded = calculator.get_base_period_percentiles()
+
+        mock_calculate.assert_not_called()
+        np.testing.assert_array_equal(loaded[90], percentiles[90])
+
+
+class TestBasePeriodDataReuse:
+
+    @pytest.fixture(autouse=True)
+    def short_base_period(self):
+        base_periods = {"temperature": {"start": "2000", "end": "2001"}}
+        with patch.object(TX90pCalculator, "BASE_PERIODS", base_periods):
+            yield
+
+    def test_partial_base_cache_downloads_the_rest(self, calculator, mock_downloader):
+        cached = MagicMock()
+        downloaded = {2001: MagicMock(), 2002: MagicMock()}
+        PercentileBasedCalculator._base_period_data_cache[calculator._get_base_data_cache_key()] = {2000: cached}
+        mock_downloader.return_value.iter_years.side_effect = lambda: iter(downloaded.items())
+
+        datasets = dict(calculator.iter_datasets_for_indicator_calculation("2000", "2002"))
+
+        assert datasets == {2000: cached, **downloaded}
+        _, kwargs = mock_downloader.call_args
+        assert kwargs["year_range"] == (2001, 2002)
+
+    def test_downloaded_base_years_are_kept_for_other_indicators(self, calculator, mock_downloader):
+        downloaded = {2000: MagicMock(), 2001: MagicMock(), 2002: MagicMock()}
+        mock_downloader.return_value.iter_years.side_effect = lambda: iter(downloaded.items())
+
+        list(calculator.iter_datasets_for_indicator_calculation("2000", "2002"))
+
+        base_data = PercentileBasedCalculator._base_period_data_cache[calculator._get_base_data_cache_key()]
+        assert base_data == {2000: downloaded[2000], 2001: downloaded[2001]}
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+import rasterio
+
+from aclimate_v3_historical_spatial_etl.climate_processing.indicators.processing_utils import (
+    KELVIN_SAMPLE_STRIDE, detect_precipitation_scale, grid_transform, is_kelvin
+)
+
+
+class TestGridTransform:
+
+    def test_pixel_centre_coordinates(self):
+        # 0.05 degree grid whose top-left corner is at (-90, 15)
+        width, height = 31, 23
+        lons = -90 + (np.arange(width) + 0.5) * 0.05
+        lats = 15 - (np.arange(height) + 0.5) * 0.05
+
+        transform = grid_transform(lons, lats, width, height)
+
+        assert transform.almost_equals(rasterio.Affine(0.05, 0, -90, 0, -0.05, 15))
+
+    def test_pixel_centres_round_trip(self):
+        lons = 10 + (np.arange(4) + 0.5) * 0.25
+        lats = 5 - (np.arange(3) + 0.5) * 0.25
+
+        transform = grid_transform(lons, lats, 4, 3)
+
+        for col, lon in enumerate(lons):
+            for row, lat in enumerate(lats):
+                assert transform * (col + 0.5, row + 0.5) == pytest.approx((lon, lat))
+
+    def test_single_row_falls_back_to_bounds(self):
+        lons = np.array([-90.0, -89.0, -88.0])
+        lats = np.array([15.0])
+
+        transform = grid_transform(lons, lats, 3, 1)
+
+        assert transform.almost_equals(rasterio.transform.from_bounds(-90.0, 15.0, -88.0, 15.0, 3, 1))
+
+
+class TestIsKelvin:
+
+    def test_kelvin(self):
+        temp = np.full((3, 4, 4), 295.0, dtype=np.float32)
+        temp[:, 0, 0] = np.nan
+        assert is_kelvin(temp)
+
+    def test_celsius(self):
+        temp = np.full((3, 4, 4), 22.0, dtype=np.float32)
+        assert not is_kelvin(temp)
+
+    def test_sample_without_data_falls_back_to_whole_cube(self):
+        # Every sampled pixel is NaN, the remaining ones hold Kelvin values
+        size = KELVIN_SAMPLE_STRIDE + 1
+        temp = np.full((2, size, size), 290.0, dtype=np.float32)
+        temp[:, ::KELVIN_SAMPLE_STRIDE, ::KELVIN_SAMPLE_STRIDE] = np.nan
+        assert is_kelvin(temp)
+
+    def test_no_valid_data(self):
+        assert not is_kelvin(np.full((2, 3, 3), np.nan, dtype=np.float32))
+
+
+class TestDetectPrecipitationScale:
+
+    def test_millimetres(self):
+        precip = np.array([[[0.0, 12.5], [np.nan, -9999.0]]], dtype=np.float32)
+        assert detect_precipitation_scale(precip) == 1.0
+
+    def test_metres(self):
+        precip = np.array([[[0.0, 0.0125], [np.nan, -9999.0]]], dtype=np.float32)
+        assert detect_precipitation_scale(precip) == 1000.0
+
+    def test_out_of_range_values_are_ignored(self):
+        precip = np.array([[[0.0, 0.0125]], [[2500.0, 0.002]]], dtype=np.float32)
+        assert detect_precipitation_scale(precip) == 1000.0
+
+    @pytest.mark.parametrize("value", [0.0, np.nan], ids=["dry", "no-data"])
+    def test_dry_or_missing_year_keeps_units(self, value):
+        precip = np.full((2, 2, 2), value, dtype=np.float32)
+        assert detect_precipitation_scale(precip) == 1.0